@@ -137,7 +137,7 @@ async def add_watched_file(request: AddWatchedFileRequest) -> dict[str, Any]:
     # Verify file exists
     figma = FigmaService()
     try:
-        file_info = await figma.get_file(request.file_key)
+        file_info = await figma.get_file_shallow(request.file_key)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Could not access Figma file: {e}")
     finally:
@@ -219,11 +219,7 @@ async def generate_documentation(
         )
         
         # Mark file as having docs generated
-        detector = get_change_detector()
-        for watched in detector.get_watched_files():
-            if watched.file_key == request.file_key:
-                watched.doc_generated = True
-                break
+        get_change_detector().mark_doc_generated(request.file_key)
         
         return {
             "id": doc.id,
@@ -263,11 +259,7 @@ async def generate_vision_documentation(
         )
         
         # Mark file as having docs generated
-        detector = get_change_detector()
-        for watched in detector.get_watched_files():
-            if watched.file_key == request.file_key:
-                watched.doc_generated = True
-                break
+        get_change_detector().mark_doc_generated(request.file_key)
         
         return {
             "id": doc.id,
@@ -431,7 +423,7 @@ async def analyze_app(request: dict[str, Any]) -> dict[str, Any]:
 
 @router.get("/ollama/status")
 async def get_ollama_status() -> dict[str, Any]:
-    """Get Ollama server status and available models."""
+    """Get Ollama server status."""
     llm_service = get_llm_service()
     return await llm_service.get_ollama_status()
 
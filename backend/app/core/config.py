@@ -14,6 +14,7 @@ class LLMGenerationConfig(BaseModel):
     temperature: float = 0.7
     max_tokens: int = 4096
     top_p: float = 0.9
+    num_keep: Optional[int] = None
 
 
 class LLMModelsConfig(BaseModel):
@@ -30,6 +31,9 @@ class LLMConfig(BaseModel):
     default_model: str = "gemma3:27b"
     models: LLMModelsConfig = Field(default_factory=LLMModelsConfig)
     ollama_base_url: str = "http://localhost:11434"
+    num_parallel: int = 4
+    keep_alive: str = "30m"
+    preload_on_startup: bool = True
     generation: LLMGenerationConfig = Field(default_factory=LLMGenerationConfig)
 
 
@@ -44,6 +48,10 @@ class FigmaConfig(BaseModel):
     api_token: str = ""
     api_base_url: str = "https://api.figma.com"
     polling_interval_minutes: int = 5
+    max_polling_interval_minutes: int = 60
+    max_concurrent_checks: int = 8
+    state_file: str = "./docs/.watch_state.json"
+    state_ttl_seconds: int = 300
     watched_files: list[WatchedFileConfig] = Field(default_factory=list)
 
 
@@ -1,5 +1,6 @@
 """Main FastAPI application for Figma Documentation Generator."""
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -11,6 +12,7 @@ from app.api.routes import router
 from app.core.config import settings
 from app.services.figma import get_change_detector
 from app.services.docs import get_doc_generator
+from app.services.llm import get_llm_service
 
 # Configure logging
 logging.basicConfig(
@@ -25,6 +27,14 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     logger.info("Starting Figma Documentation Generator...")
     
+    # Create the LLM service now so its connection warmup runs during startup
+    llm_service = get_llm_service()
+    
+    # Load models in the background; large models can take minutes
+    preload_task = None
+    if settings.llm.preload_on_startup:
+        preload_task = asyncio.create_task(llm_service.preload_models())
+    
     # Initialize change detector
     detector = get_change_detector()
     await detector.initialize()
@@ -51,6 +61,9 @@ async def lifespan(app: FastAPI):
     # Cleanup
     logger.info("Shutting down...")
     detector.stop()
+    if preload_task:
+        preload_task.cancel()
+    await llm_service.aclose()
 
 
 # Create FastAPI app
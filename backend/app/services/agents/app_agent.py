@@ -588,13 +588,13 @@ Be practical and user-focused."""
 
         # Save markdown
         md_path = self.output_dir / "markdown" / f"{safe_name}.md"
-        md_path.write_text(markdown_content)
+        md_path.write_text(markdown_content, encoding="utf-8")
         logger.info(f"Saved markdown: {md_path}")
 
         # Save HTML
         html_content = self._convert_to_html(doc, markdown_content)
         html_path = self.output_dir / "html" / f"{safe_name}.html"
-        html_path.write_text(html_content)
+        html_path.write_text(html_content, encoding="utf-8")
         logger.info(f"Saved HTML: {html_path}")
 
         # Save metadata JSON
@@ -615,7 +615,7 @@ Be practical and user-focused."""
             ],
             "screenshots": getattr(doc, "_screenshots", []),
         }
-        meta_path.write_text(json.dumps(meta_data, indent=2))
+        meta_path.write_text(json.dumps(meta_data, indent=2), encoding="utf-8")
 
     def _convert_to_html(self, doc: Documentation, markdown_content: str) -> str:
         """Convert markdown to HTML.
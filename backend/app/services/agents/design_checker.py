@@ -4,7 +4,6 @@ import asyncio
 import base64
 import io
 import logging
-import math
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
@@ -16,6 +15,47 @@ from app.services.llm import LLMService, get_llm_service
 
 logger = logging.getLogger(__name__)
 
+# Check status -> summary counter it increments
+_STATUS_KEY = {
+    "pass": "passed",
+    "fail": "failed",
+    "warning": "warnings",
+    "error": "warnings",
+}
+
+
+def _diff_kernel(figma_img, app_img, threshold: int) -> tuple[Any, int]:
+    """Build the red-overlay diff image and count differing pixels.
+    
+    Runs entirely inside Pillow's C routines: per-channel absolute difference,
+    squared distance against ``threshold ** 2`` as a mask, then one composite.
+    
+    Args:
+        figma_img: Figma frame as an RGB image.
+        app_img: App screenshot as an RGB image of the same size.
+        threshold: Euclidean RGB distance above which a pixel differs.
+        
+    Returns:
+        Tuple of (diff image, number of differing pixels).
+    """
+    from PIL import Image, ImageChops, ImageMath
+    
+    r, g, b = ImageChops.difference(figma_img, app_img).split()
+    threshold_sq = threshold * threshold
+    mask = ImageMath.lambda_eval(
+        lambda args: args["convert"](
+            (args["r"] * args["r"] + args["g"] * args["g"] + args["b"] * args["b"] > threshold_sq) * 255,
+            "L",
+        ),
+        r=r,
+        g=g,
+        b=b,
+    )
+    diff_pixels = mask.histogram()[255]
+    
+    red = Image.new("RGB", app_img.size, (255, 0, 0))
+    return Image.composite(red, app_img, mask), diff_pixels
+
 
 class DesignChecker:
     """Agent for comparing Figma designs with actual application implementations.
@@ -290,13 +330,7 @@ class DesignChecker:
     def _update_counts(self, comparison: dict, check_result: dict):
         """Update pass/fail/warning counts."""
         comparison["total_checks"] += 1
-        status = check_result.get("status", "warning")
-        if status == "pass":
-            comparison["passed"] += 1
-        elif status == "fail":
-            comparison["failed"] += 1
-        else:
-            comparison["warnings"] += 1
+        comparison[_STATUS_KEY.get(check_result.get("status"), "warnings")] += 1
     
     async def _get_figma_screenshot(
         self,
@@ -313,23 +347,14 @@ class DesignChecker:
             Screenshot bytes or None.
         """
         try:
-            images = await self.figma_service.get_images(
+            # Render and download over the service's pooled CDN client
+            images = await self.figma_service.download_images(
                 file_key,
                 [node_id],
                 format="png",
                 scale=2.0,
             )
-            
-            image_url = images.get(node_id)
-            if not image_url:
-                return None
-            
-            # Download the image
-            import httpx
-            async with httpx.AsyncClient() as client:
-                response = await client.get(image_url)
-                response.raise_for_status()
-                return response.content
+            return images.get(node_id)
                 
         except Exception as e:
             logger.error(f"Failed to get Figma screenshot: {e}")
@@ -494,35 +519,9 @@ class DesignChecker:
             app_img = app_img.convert("RGB")
             
             # Calculate simple pixel difference
-            diff_pixels = 0
             total_pixels = target_size[0] * target_size[1]
-            
-            figma_data = figma_img.load()
-            app_data = app_img.load()
-            
-            # Create diff image
-            diff_img = Image.new("RGB", target_size)
-            diff_data = diff_img.load()
-            
             threshold = 30  # Color difference threshold
-            
-            for x in range(target_size[0]):
-                for y in range(target_size[1]):
-                    fp = figma_data[x, y]
-                    ap = app_data[x, y]
-                    
-                    # Calculate color distance
-                    dist = math.sqrt(
-                        (fp[0] - ap[0]) ** 2 +
-                        (fp[1] - ap[1]) ** 2 +
-                        (fp[2] - ap[2]) ** 2
-                    )
-                    
-                    if dist > threshold:
-                        diff_pixels += 1
-                        diff_data[x, y] = (255, 0, 0)  # Red for difference
-                    else:
-                        diff_data[x, y] = app_data[x, y]
+            diff_img, diff_pixels = _diff_kernel(figma_img, app_img, threshold)
             
             similarity = ((total_pixels - diff_pixels) / total_pixels) * 100
             
@@ -1,9 +1,15 @@
 """Simple chatbot for documentation queries."""
 
+import asyncio
 import logging
+import os
+import threading
 from pathlib import Path
 from typing import Any, Optional
 
+import aiofiles
+import orjson
+
 from app.core.config import settings
 from app.models.doc_models import ChatMessage, ChatResponse
 from app.services.llm import LLMService, get_llm_service
@@ -27,6 +33,10 @@ class DocumentationChatbot:
         """
         self.llm_service = llm_service or get_llm_service()
         self.docs_dir = Path(docs_dir or settings.documentation.output_dir) / "markdown"
+        
+        # (directory signature, figma_file_key -> markdown files); the None key
+        # holds files without metadata
+        self._key_index: Optional[tuple[tuple, dict[Optional[str], list[Path]]]] = None
     
     async def chat(
         self,
@@ -45,7 +55,7 @@ class DocumentationChatbot:
             ChatResponse with answer and sources.
         """
         # Load documentation as context
-        context, sources = self._load_documentation(file_key)
+        context, sources = await self._load_documentation(file_key)
         
         # Convert history to dict format
         history_dicts = []
@@ -65,12 +75,15 @@ class DocumentationChatbot:
             figma_references=[],
         )
     
-    def _load_documentation(
+    async def _load_documentation(
         self,
         file_key: Optional[str] = None,
     ) -> tuple[str, list[str]]:
         """Load documentation files as context.
         
+        Files are read concurrently so a large docs directory does not
+        block the event loop one file at a time.
+        
         Args:
             file_key: Optional file key to filter.
             
@@ -81,18 +94,23 @@ class DocumentationChatbot:
         sources = []
         
         try:
-            for md_file in self.docs_dir.glob("*.md"):
-                # Check file key filter
-                if file_key:
-                    meta_file = md_file.with_name(md_file.stem + "_meta.json")
-                    if meta_file.exists():
-                        import json
-                        with open(meta_file) as f:
-                            meta = json.load(f)
-                        if meta.get("figma_file_key") != file_key:
-                            continue
+            if file_key:
+                index = await asyncio.to_thread(self._get_key_index)
+                md_files = index.get(file_key, []) + index.get(None, [])
+            else:
+                md_files = list(self.docs_dir.glob("*.md"))
+            
+            contents = await asyncio.gather(
+                *(self._read_doc_file(md_file) for md_file in md_files),
+                return_exceptions=True,
+            )
+            
+            for md_file, content in zip(md_files, contents):
+                if isinstance(content, Exception):
+                    # Skip unreadable files but keep the context from the rest
+                    logger.error(f"Error reading {md_file}: {content}")
+                    continue
                 
-                content = md_file.read_text()
                 # Truncate to avoid token limits
                 if len(content) > 6000:
                     content = content[:6000] + "\n... (truncated)"
@@ -104,15 +122,71 @@ class DocumentationChatbot:
             logger.error(f"Error loading documentation: {e}")
         
         return "\n\n---\n\n".join(context_parts), sources
+    
+    def _get_key_index(self) -> dict[Optional[str], list[Path]]:
+        """Map Figma file keys to their markdown files.
+        
+        The index is rebuilt only when the docs directory or one of the
+        metadata files changes, i.e. when documentation files are added,
+        removed or renamed, or a _meta.json is rewritten in place. Blocking;
+        call it through asyncio.to_thread.
+        
+        Returns:
+            Dict of file key to markdown paths; None maps files without metadata.
+        """
+        try:
+            with os.scandir(self.docs_dir) as entries:
+                meta_mtimes = sorted(
+                    (entry.name, entry.stat().st_mtime_ns)
+                    for entry in entries
+                    if entry.name.endswith("_meta.json")
+                )
+            signature = (self.docs_dir.stat().st_mtime_ns, tuple(meta_mtimes))
+        except FileNotFoundError:
+            return {}
+        
+        cached = self._key_index
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        
+        index: dict[Optional[str], list[Path]] = {}
+        for md_file in self.docs_dir.glob("*.md"):
+            key = None
+            meta_file = md_file.with_name(md_file.stem + "_meta.json")
+            if meta_file.exists():
+                try:
+                    key = orjson.loads(meta_file.read_bytes()).get("figma_file_key")
+                except (OSError, orjson.JSONDecodeError) as e:
+                    logger.error(f"Error reading {meta_file}: {e}")
+                    continue
+            index.setdefault(key, []).append(md_file)
+        
+        self._key_index = (signature, index)
+        return index
+    
+    async def _read_doc_file(self, md_file: Path) -> str:
+        """Read a markdown documentation file.
+        
+        Args:
+            md_file: Markdown file path.
+            
+        Returns:
+            File content.
+        """
+        async with aiofiles.open(md_file, "rb") as f:
+            return (await f.read()).decode("utf-8")
 
 
 # Global chatbot instance
 _chatbot: Optional[DocumentationChatbot] = None
+_chatbot_lock = threading.Lock()
 
 
 def get_chatbot() -> DocumentationChatbot:
     """Get or create the global chatbot instance."""
     global _chatbot
     if _chatbot is None:
-        _chatbot = DocumentationChatbot()
+        with _chatbot_lock:
+            if _chatbot is None:
+                _chatbot = DocumentationChatbot()
     return _chatbot
@@ -1,14 +1,16 @@
 """Documentation generator service."""
 
-import json
 import logging
 import os
+import re
+import threading
 import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
 
 import markdown
+import orjson
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 from app.core.config import settings
@@ -19,6 +21,9 @@ from app.services.llm import LLMService, get_llm_service
 
 logger = logging.getLogger(__name__)
 
+# Level-2 markdown heading; re.split yields [preamble, title, body, title, body, ...]
+_SECTION_RE = re.compile(r"^## (.*)$", re.MULTILINE)
+
 
 class DocGenerator:
     """Service for generating documentation from Figma designs."""
@@ -44,6 +49,12 @@ class DocGenerator:
         (self.output_dir / "markdown").mkdir(parents=True, exist_ok=True)
         (self.output_dir / "html").mkdir(parents=True, exist_ok=True)
         
+        # Parsed *_meta.json files keyed by path, with the mtime they were read at
+        self._meta_cache: dict[Path, tuple[int, dict[str, Any]]] = {}
+        self._sorted_docs: list[dict[str, Any]] = []
+        self._by_id: dict[str, dict[str, Any]] = {}
+        self._by_file_key: dict[str, list[dict[str, Any]]] = {}
+        
         # Initialize Jinja2 for HTML templates
         self._init_templates()
     
@@ -61,6 +72,15 @@ class DocGenerator:
             loader=FileSystemLoader(str(template_dir)),
             autoescape=select_autoescape(["html", "xml"]),
         )
+        self._template = self.jinja_env.get_template("doc_template.html")
+        
+        # Extension loading is the expensive part of Markdown(), so build it once
+        self._md = markdown.Markdown(
+            extensions=["fenced_code", "tables", "toc", "codehilite"],
+            extension_configs={
+                "codehilite": {"css_class": "highlight"},
+            },
+        )
     
     def _create_default_template(self, path: Path) -> None:
         """Create the default HTML template."""
@@ -260,7 +280,7 @@ class DocGenerator:
 </body>
 </html>
 '''
-        path.write_text(template_content)
+        path.write_text(template_content, encoding="utf-8")
     
     async def generate_from_figma(
         self,
@@ -517,38 +537,18 @@ Write clearly with appropriate sections for each audience."""
         Returns:
             List of DocSection objects.
         """
-        sections = []
-        current_section = None
-        current_content = []
-        section_order = 0
-        
-        for line in markdown_content.split("\n"):
-            # Check for headers
-            if line.startswith("## "):
-                # Save previous section
-                if current_section:
-                    current_section.content = "\n".join(current_content).strip()
-                    sections.append(current_section)
-                
-                # Start new section
-                title = line[3:].strip()
-                current_section = DocSection(
-                    id=str(uuid.uuid4()),
-                    title=title,
-                    content="",
-                    order=section_order,
-                )
-                current_content = []
-                section_order += 1
-            elif current_section:
-                current_content.append(line)
-        
-        # Save last section
-        if current_section:
-            current_section.content = "\n".join(current_content).strip()
-            sections.append(current_section)
-        
-        return sections
+        parts = _SECTION_RE.split(markdown_content)
+        
+        # parts[0] is the text before the first section and is not kept
+        return [
+            DocSection(
+                id=uuid.uuid4().hex,
+                title=title.strip(),
+                content=body.strip(),
+                order=order,
+            )
+            for order, (title, body) in enumerate(zip(parts[1::2], parts[2::2]))
+        ]
     
     async def _save_documentation(
         self,
@@ -570,14 +570,13 @@ Write clearly with appropriate sections for each audience."""
         # Save markdown
         if DocFormat.MARKDOWN in formats:
             md_path = self.output_dir / "markdown" / f"{safe_name}.md"
-            md_path.write_text(markdown_content)
+            md_path.write_text(markdown_content, encoding="utf-8")
             logger.info(f"Saved markdown: {md_path}")
         
         # Save HTML
         if DocFormat.HTML in formats:
-            html_content = self._convert_to_html(doc, markdown_content)
             html_path = self.output_dir / "html" / f"{safe_name}.html"
-            html_path.write_text(html_content)
+            self._write_html(doc, markdown_content, html_path)
             logger.info(f"Saved HTML: {html_path}")
         
         # Save metadata JSON
@@ -597,36 +596,31 @@ Write clearly with appropriate sections for each audience."""
                 for s in doc.sections
             ],
         }
-        meta_path.write_text(json.dumps(meta_data, indent=2))
+        meta_path.write_bytes(orjson.dumps(meta_data, option=orjson.OPT_INDENT_2))
     
-    def _convert_to_html(self, doc: Documentation, markdown_content: str) -> str:
-        """Convert markdown to HTML using template.
+    def _write_html(self, doc: Documentation, markdown_content: str, path: Path) -> None:
+        """Convert markdown to HTML and stream the rendered template to a file.
+        
+        The template is rendered chunk by chunk straight into the file, so the
+        full page never exists as one string next to the converted body.
         
         Args:
             doc: Documentation object.
             markdown_content: Raw markdown content.
-            
-        Returns:
-            HTML string.
+            path: Destination HTML file.
         """
         # Convert markdown to HTML
-        md = markdown.Markdown(
-            extensions=["fenced_code", "tables", "toc", "codehilite"],
-            extension_configs={
-                "codehilite": {"css_class": "highlight"},
-            },
-        )
-        html_content = md.convert(markdown_content)
+        html_content = self._md.reset().convert(markdown_content)
         
         # Render with template
-        template = self.jinja_env.get_template("doc_template.html")
-        return template.render(
-            title=doc.title,
-            content=html_content,
-            generated_at=doc.created_at.strftime("%Y-%m-%d %H:%M"),
-            version=doc.version,
-            doc_type=doc.doc_type.value.upper(),
-        )
+        with path.open("w", encoding="utf-8") as fp:
+            fp.writelines(self._template.generate(
+                title=doc.title,
+                content=html_content,
+                generated_at=doc.created_at.strftime("%Y-%m-%d %H:%M"),
+                version=doc.version,
+                doc_type=doc.doc_type.value.upper(),
+            ))
     
     async def update_documentation(
         self,
@@ -646,23 +640,53 @@ Write clearly with appropriate sections for each audience."""
         # Future: implement diff-based updates
         return await self.generate_from_figma(file_key, doc_type)
     
-    def list_documentation(self) -> list[dict[str, Any]]:
-        """List all generated documentation.
-        
-        Returns:
-            List of documentation metadata.
-        """
-        docs = []
+    def _refresh_meta_cache(self) -> None:
+        """Re-read metadata files whose mtime changed and rebuild lookup indexes."""
         meta_dir = self.output_dir / "markdown"
+        seen = set()
+        changed = False
         
         for meta_file in meta_dir.glob("*_meta.json"):
+            seen.add(meta_file)
             try:
-                with open(meta_file) as f:
-                    docs.append(json.load(f))
+                mtime = meta_file.stat().st_mtime_ns
+                cached = self._meta_cache.get(meta_file)
+                if cached and cached[0] == mtime:
+                    continue
+                self._meta_cache[meta_file] = (mtime, orjson.loads(meta_file.read_bytes()))
+                changed = True
             except Exception as e:
                 logger.error(f"Error reading {meta_file}: {e}")
+                if self._meta_cache.pop(meta_file, None):
+                    changed = True
+        
+        for stale in self._meta_cache.keys() - seen:
+            del self._meta_cache[stale]
+            changed = True
+        
+        if not changed:
+            return
         
-        return sorted(docs, key=lambda d: d.get("created_at", ""), reverse=True)
+        self._sorted_docs = sorted(
+            (meta for _, meta in self._meta_cache.values()),
+            key=lambda d: d.get("created_at", ""),
+            reverse=True,
+        )
+        self._by_id = {}
+        self._by_file_key = {}
+        for doc in self._sorted_docs:
+            # Newest first: the first entry per ID wins, file key lists keep the order
+            self._by_id.setdefault(doc.get("id"), doc)
+            self._by_file_key.setdefault(doc.get("figma_file_key"), []).append(doc)
+    
+    def list_documentation(self) -> list[dict[str, Any]]:
+        """List all generated documentation.
+        
+        Returns:
+            List of documentation metadata.
+        """
+        self._refresh_meta_cache()
+        return list(self._sorted_docs)
     
     def get_documentation(self, doc_id: str) -> Optional[dict[str, Any]]:
         """Get documentation by ID.
@@ -673,22 +697,26 @@ Write clearly with appropriate sections for each audience."""
         Returns:
             Documentation data or None.
         """
-        for doc in self.list_documentation():
-            if doc.get("id") == doc_id:
-                # Load full content
-                safe_name = "".join(
-                    c if c.isalnum() or c in "._- " else "_"
-                    for c in doc.get("figma_file_name", "")
-                )
-                safe_name = safe_name.replace(" ", "_").lower()
-                
-                md_path = self.output_dir / "markdown" / f"{safe_name}.md"
-                if md_path.exists():
-                    doc["content"] = md_path.read_text()
-                
-                return doc
+        self._refresh_meta_cache()
+        cached = self._by_id.get(doc_id)
+        if cached is None:
+            return None
+        
+        # Copy so the loaded content does not end up in the cache
+        doc = dict(cached)
+        
+        # Load full content
+        safe_name = "".join(
+            c if c.isalnum() or c in "._- " else "_"
+            for c in doc.get("figma_file_name", "")
+        )
+        safe_name = safe_name.replace(" ", "_").lower()
         
-        return None
+        md_path = self.output_dir / "markdown" / f"{safe_name}.md"
+        if md_path.exists():
+            doc["content"] = md_path.read_bytes().decode("utf-8")
+        
+        return doc
     
     def get_documentation_content(
         self,
@@ -704,33 +732,36 @@ Write clearly with appropriate sections for each audience."""
         Returns:
             Documentation content or None.
         """
-        for doc in self.list_documentation():
-            if doc.get("figma_file_key") == file_key:
-                safe_name = "".join(
-                    c if c.isalnum() or c in "._- " else "_"
-                    for c in doc.get("figma_file_name", "")
-                )
-                safe_name = safe_name.replace(" ", "_").lower()
-                
-                if format == DocFormat.MARKDOWN:
-                    path = self.output_dir / "markdown" / f"{safe_name}.md"
-                else:
-                    path = self.output_dir / "html" / f"{safe_name}.html"
-                
-                if path.exists():
-                    return path.read_text()
+        self._refresh_meta_cache()
+        for doc in self._by_file_key.get(file_key, []):
+            safe_name = "".join(
+                c if c.isalnum() or c in "._- " else "_"
+                for c in doc.get("figma_file_name", "")
+            )
+            safe_name = safe_name.replace(" ", "_").lower()
+            
+            if format == DocFormat.MARKDOWN:
+                path = self.output_dir / "markdown" / f"{safe_name}.md"
+            else:
+                path = self.output_dir / "html" / f"{safe_name}.html"
+            
+            if path.exists():
+                return path.read_bytes().decode("utf-8")
         
         return None
 
 
 # Global doc generator instance
 _doc_generator: Optional[DocGenerator] = None
+_doc_generator_lock = threading.Lock()
 
 
 def get_doc_generator() -> DocGenerator:
     """Get or create the global doc generator instance."""
     global _doc_generator
     if _doc_generator is None:
-        _doc_generator = DocGenerator()
+        with _doc_generator_lock:
+            if _doc_generator is None:
+                _doc_generator = DocGenerator()
     return _doc_generator
 
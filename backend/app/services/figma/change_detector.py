@@ -1,12 +1,21 @@
 """Change detection service for Figma files using polling."""
 
 import asyncio
+import functools
+import heapq
+import itertools
 import logging
-from datetime import datetime
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any, Callable, Optional
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+import httpx
+import orjson
 
 from app.core.config import settings
 from app.models.figma_models import FileChangeEvent, WatchedFile
@@ -14,6 +23,51 @@ from app.services.figma.figma_service import FigmaService
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait before writing persisted watch state, batching bursts of checks
+_STATE_FLUSH_DELAY = 30.0
+
+
+@dataclass(slots=True)
+class _WatchedState:
+    """Internal polling state of a watched file.
+    
+    Converted to the public WatchedFile model only at API boundaries.
+    """
+    file_key: str
+    name: str
+    min_interval: float
+    max_interval: float
+    current_interval: float
+    last_version: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    last_checked_monotonic: Optional[float] = None
+    etag: Optional[str] = None
+    last_modified_header: Optional[str] = None
+    doc_generated: bool = False
+    
+    def to_model(self, now: datetime, now_monotonic: float) -> WatchedFile:
+        """Build the public WatchedFile model.
+        
+        Args:
+            now: Current wall-clock time.
+            now_monotonic: Current monotonic time, taken together with now.
+            
+        Returns:
+            WatchedFile with last_checked derived from the monotonic timestamp.
+        """
+        last_checked = None
+        if self.last_checked_monotonic is not None:
+            last_checked = now - timedelta(seconds=now_monotonic - self.last_checked_monotonic)
+        
+        return WatchedFile(
+            file_key=self.file_key,
+            name=self.name,
+            last_version=self.last_version,
+            last_modified=self.last_modified,
+            last_checked=last_checked,
+            doc_generated=self.doc_generated,
+        )
+
 
 class FigmaChangeDetector:
     """Service for detecting changes in Figma files through polling."""
@@ -31,11 +85,49 @@ class FigmaChangeDetector:
         """
         self.figma_service = figma_service or FigmaService()
         self.polling_interval = polling_interval_minutes or settings.figma.polling_interval_minutes
+        self.max_polling_interval = max(
+            settings.figma.max_polling_interval_minutes, self.polling_interval
+        )
+        
+        # Polling loop state: heap of (deadline, seq, file_key) on the loop clock
+        self._task: Optional[asyncio.Task] = None
+        self._schedule: list[tuple[float, int, str]] = []
+        self._next_run: dict[str, float] = {}
+        self._schedule_seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._check_tasks: set[asyncio.Task] = set()
         
-        self._scheduler: Optional[AsyncIOScheduler] = None
-        self._watched_files: dict[str, WatchedFile] = {}
-        self._change_callbacks: list[Callable[[FileChangeEvent], Any]] = []
+        # Change events are dispatched to callbacks by a background worker
+        self._event_queue: asyncio.Queue[FileChangeEvent] = asyncio.Queue(maxsize=100)
+        self._event_worker: Optional[asyncio.Task] = None
+        
+        self._watched_files: dict[str, _WatchedState] = {}
+        self._in_flight: dict[str, asyncio.Future] = {}
+        # (callback, is_coroutine_function) pairs, classified once at registration
+        self._change_callbacks: list[tuple[Callable[[FileChangeEvent], Any], bool]] = []
+        # Immutable copy iterated on dispatch, rebuilt on registration
+        self._callbacks_snapshot: tuple[tuple[Callable[[FileChangeEvent], Any], bool], ...] = ()
         self._is_running = False
+        
+        # Watch state persisted across restarts, flushed by a debounced task
+        self._state_path = Path(settings.figma.state_file)
+        self._state_ttl = settings.figma.state_ttl_seconds
+        self._flush_task: Optional[asyncio.Task] = None
+        # Bumped on every state change; writes older than the last written one are dropped
+        self._state_generation = 0
+        self._written_generation = 0
+        self._state_write_lock = threading.Lock()
+    
+    def _new_state(self, file_key: str, name: str) -> _WatchedState:
+        """Create polling state for a file at the base polling interval."""
+        min_interval = self.polling_interval * 60
+        return _WatchedState(
+            file_key=file_key,
+            name=name,
+            current_interval=min_interval,
+            min_interval=min_interval,
+            max_interval=self.max_polling_interval * 60,
+        )
     
     def add_watched_file(self, file_key: str, name: str) -> WatchedFile:
         """Add a file to watch for changes.
@@ -47,10 +139,14 @@ class FigmaChangeDetector:
         Returns:
             WatchedFile configuration object.
         """
-        watched = WatchedFile(file_key=file_key, name=name)
+        watched = self._new_state(file_key, name)
         self._watched_files[file_key] = watched
-        logger.info(f"Added file to watch: {name} ({file_key})")
-        return watched
+        logger.info("Added file to watch: %s (%s)", name, file_key)
+        
+        if self._is_running:
+            self._schedule_check(watched, self._initial_delay(watched))
+        
+        return watched.to_model(datetime.now(), time.monotonic())
     
     def remove_watched_file(self, file_key: str) -> bool:
         """Remove a file from watching.
@@ -61,19 +157,40 @@ class FigmaChangeDetector:
         Returns:
             True if file was being watched, False otherwise.
         """
-        if file_key in self._watched_files:
-            del self._watched_files[file_key]
-            logger.info(f"Removed file from watch: {file_key}")
+        if self._watched_files.pop(file_key, None) is not None:
+            self._next_run.pop(file_key, None)
+            logger.info("Removed file from watch: %s", file_key)
             return True
         return False
     
     def get_watched_files(self) -> list[WatchedFile]:
         """Get list of all watched files.
         
+        The wall-clock last_checked is derived here from the monotonic
+        timestamp recorded on each poll.
+        
         Returns:
             List of WatchedFile objects.
         """
-        return list(self._watched_files.values())
+        now = datetime.now()
+        now_monotonic = time.monotonic()
+        return [watched.to_model(now, now_monotonic) for watched in self._watched_files.values()]
+    
+    def mark_doc_generated(self, file_key: str) -> bool:
+        """Record that documentation was generated for a watched file.
+        
+        Args:
+            file_key: Figma file key.
+            
+        Returns:
+            True if file is being watched, False otherwise.
+        """
+        watched = self._watched_files.get(file_key)
+        if watched is None:
+            return False
+        watched.doc_generated = True
+        self._schedule_state_flush()
+        return True
     
     def on_change(self, callback: Callable[[FileChangeEvent], Any]) -> None:
         """Register a callback for file change events.
@@ -81,21 +198,60 @@ class FigmaChangeDetector:
         Args:
             callback: Function to call when a file changes.
         """
-        self._change_callbacks.append(callback)
+        self._change_callbacks.append((callback, asyncio.iscoroutinefunction(callback)))
+        self._callbacks_snapshot = tuple(self._change_callbacks)
     
     async def _notify_change(self, event: FileChangeEvent) -> None:
-        """Notify all registered callbacks of a change.
+        """Queue a change event for the registered callbacks.
         
         Args:
             event: The change event to notify about.
         """
-        for callback in self._change_callbacks:
+        self._ensure_event_worker()
+        try:
+            self._event_queue.put_nowait(event)
+        except asyncio.QueueFull:
+            await self._event_queue.put(event)
+    
+    def _ensure_event_worker(self) -> None:
+        """Start the callback worker if it is not running."""
+        if self._event_worker is None or self._event_worker.done():
+            self._event_worker = asyncio.create_task(self._event_worker_loop())
+    
+    async def _event_worker_loop(self) -> None:
+        """Dispatch queued change events to all registered callbacks."""
+        while True:
+            event = await self._event_queue.get()
             try:
-                result = callback(event)
-                if asyncio.iscoroutine(result):
-                    await result
-            except Exception as e:
-                logger.error(f"Error in change callback: {e}")
+                await asyncio.gather(
+                    *(
+                        self._invoke_callback(callback, is_coro, event)
+                        for callback, is_coro in self._callbacks_snapshot
+                    )
+                )
+            finally:
+                self._event_queue.task_done()
+    
+    async def _invoke_callback(
+        self,
+        callback: Callable[[FileChangeEvent], Any],
+        is_coro: bool,
+        event: FileChangeEvent,
+    ) -> None:
+        """Call a sync or async change callback, logging any error.
+        
+        Args:
+            callback: The callback to invoke.
+            is_coro: Whether the callback is a coroutine function.
+            event: The change event to pass.
+        """
+        try:
+            if is_coro:
+                await callback(event)
+            else:
+                callback(event)
+        except Exception:
+            logger.exception("Error in change callback")
     
     async def check_file(self, file_key: str) -> Optional[FileChangeEvent]:
         """Check a single file for changes.
@@ -106,46 +262,83 @@ class FigmaChangeDetector:
         Returns:
             FileChangeEvent if file changed, None otherwise.
         """
-        if file_key not in self._watched_files:
-            logger.warning(f"File {file_key} is not being watched")
+        watched = self._watched_files.get(file_key)
+        if watched is None:
+            logger.warning("File %s is not being watched", file_key)
             return None
         
-        watched = self._watched_files[file_key]
+        # Join a check of the same file that is already running
+        in_flight = self._in_flight.get(file_key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
         
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[file_key] = future
+        event = None
         try:
-            has_changed, new_version, new_modified = await self.figma_service.check_file_changed(
+            result = await self.figma_service.check_file_changed_conditional(
                 file_key,
                 watched.last_version,
                 watched.last_modified,
+                etag=watched.etag,
+                if_modified_since=watched.last_modified_header,
             )
+            event = await self._apply_check_result(watched, result)
+            return event
             
-            watched.last_checked = datetime.now()
-            
-            if has_changed and new_version:
-                logger.info(f"Change detected in {watched.name} ({file_key})")
-                
-                event = FileChangeEvent(
-                    file_key=file_key,
-                    file_name=watched.name,
-                    old_version=watched.last_version,
-                    new_version=new_version,
-                    changed_at=new_modified or datetime.now(),
-                )
-                
-                # Update watched file state
-                watched.last_version = new_version
-                watched.last_modified = new_modified
-                
-                # Notify callbacks
-                await self._notify_change(event)
-                
-                return event
-            
+        except (httpx.HTTPError, TimeoutError):
+            logger.exception("Error checking file %s", file_key)
             return None
+        finally:
+            self._in_flight.pop(file_key, None)
+            if not future.done():
+                future.set_result(event)
+    
+    async def _apply_check_result(
+        self,
+        watched: _WatchedState,
+        result: tuple[bool, Optional[str], Optional[datetime], Optional[str], Optional[str]],
+    ) -> Optional[FileChangeEvent]:
+        """Update watched file state from a change check and notify on change.
+        
+        Args:
+            watched: The watched file that was checked.
+            result: Tuple returned by FigmaService.check_file_changed_conditional.
             
-        except Exception as e:
-            logger.error(f"Error checking file {file_key}: {e}")
+        Returns:
+            FileChangeEvent if file changed, None otherwise.
+        """
+        has_changed, new_version, new_modified, etag, last_modified_header = result
+        if new_version is None:
+            # Failed check: leave the last successful state and check time as they are
             return None
+        
+        watched.etag = etag
+        watched.last_modified_header = last_modified_header
+        watched.last_checked_monotonic = time.monotonic()
+        self._schedule_state_flush()
+        
+        if has_changed and new_version:
+            logger.info("Change detected in %s (%s)", watched.name, watched.file_key)
+            
+            event = FileChangeEvent(
+                file_key=watched.file_key,
+                file_name=watched.name,
+                old_version=watched.last_version,
+                new_version=new_version,
+                changed_at=new_modified or datetime.now(),
+            )
+            
+            # Update watched file state
+            watched.last_version = new_version
+            watched.last_modified = new_modified
+            
+            # Notify callbacks
+            await self._notify_change(event)
+            
+            return event
+        
+        return None
     
     async def check_all_files(self) -> list[FileChangeEvent]:
         """Check all watched files for changes.
@@ -153,44 +346,150 @@ class FigmaChangeDetector:
         Returns:
             List of FileChangeEvent for files that changed.
         """
-        events = []
+        loop = asyncio.get_running_loop()
         
-        for file_key in self._watched_files:
-            event = await self.check_file(file_key)
-            if event:
-                events.append(event)
+        # Files with a check already running are joined rather than re-requested
+        joined: list[asyncio.Future] = []
+        watched_files: list[_WatchedState] = []
+        futures: dict[str, asyncio.Future] = {}
+        for watched in list(self._watched_files.values()):
+            in_flight = self._in_flight.get(watched.file_key)
+            if in_flight is not None:
+                joined.append(in_flight)
+            else:
+                futures[watched.file_key] = self._in_flight[watched.file_key] = loop.create_future()
+                watched_files.append(watched)
         
+        events = []
+        try:
+            results = await self.figma_service.check_files_changed([
+                (w.file_key, w.last_version, w.last_modified, w.etag, w.last_modified_header)
+                for w in watched_files
+            ])
+            
+            for watched in watched_files:
+                result = results.get(watched.file_key)
+                if result is None:
+                    continue
+                event = await self._apply_check_result(watched, result)
+                futures[watched.file_key].set_result(event)
+                if event:
+                    events.append(event)
+        finally:
+            for file_key, future in futures.items():
+                self._in_flight.pop(file_key, None)
+                if not future.done():
+                    future.set_result(None)
+        
+        joined_events = await asyncio.gather(*(asyncio.shield(future) for future in joined))
+        events.extend(event for event in joined_events if event)
         return events
     
-    async def _polling_job(self) -> None:
-        """Job executed by the scheduler to check for changes."""
-        logger.debug("Running scheduled change detection...")
-        await self.check_all_files()
+    @staticmethod
+    def _initial_delay(watched: _WatchedState) -> float:
+        """Get a jittered first delay so watched files do not fire together."""
+        return random.uniform(0, watched.min_interval)
+    
+    def _schedule_check(self, watched: _WatchedState, delay: float) -> None:
+        """Schedule the next check of a watched file.
+        
+        Args:
+            watched: The watched file to check.
+            delay: Seconds until the check runs.
+        """
+        deadline = asyncio.get_running_loop().time() + delay
+        self._next_run[watched.file_key] = deadline
+        heapq.heappush(self._schedule, (deadline, next(self._schedule_seq), watched.file_key))
+        self._wakeup.set()
+    
+    async def _run_loop(self) -> None:
+        """Sleep until the earliest scheduled check is due and dispatch it."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            self._wakeup.clear()
+            
+            if not self._schedule:
+                await self._wakeup.wait()
+                continue
+            
+            deadline, _, file_key = self._schedule[0]
+            delay = deadline - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except TimeoutError:
+                    pass
+                continue
+            
+            heapq.heappop(self._schedule)
+            
+            # Skip entries superseded by a reschedule or a removed file
+            if self._next_run.get(file_key) != deadline:
+                continue
+            del self._next_run[file_key]
+            
+            task = asyncio.create_task(self._check_file_job(file_key))
+            self._check_tasks.add(task)
+            task.add_done_callback(self._check_tasks.discard)
+    
+    async def _check_file_job(self, file_key: str) -> None:
+        """Check one file and reschedule it.
+        
+        Files that stay unchanged back off exponentially up to their
+        max_interval; a detected change resets them to min_interval.
+        """
+        logger.debug("Running scheduled change detection for %s...", file_key)
+        event = await self.check_file(file_key)
+        
+        watched = self._watched_files.get(file_key)
+        if watched is None or not self._is_running:
+            return
+        
+        if event:
+            watched.current_interval = watched.min_interval
+        else:
+            watched.current_interval = min(watched.current_interval * 2, watched.max_interval)
+        
+        self._schedule_check(watched, watched.current_interval)
     
     def start(self) -> None:
-        """Start the polling scheduler."""
+        """Start the polling loop."""
         if self._is_running:
             logger.warning("Change detector is already running")
             return
         
-        self._scheduler = AsyncIOScheduler()
-        self._scheduler.add_job(
-            self._polling_job,
-            IntervalTrigger(minutes=self.polling_interval),
-            id="figma_change_detection",
-            name="Figma Change Detection",
-            replace_existing=True,
-        )
-        self._scheduler.start()
         self._is_running = True
+        for watched in self._watched_files.values():
+            watched.current_interval = watched.min_interval
+            self._schedule_check(watched, self._initial_delay(watched))
+        self._task = asyncio.create_task(self._run_loop())
+        self._ensure_event_worker()
         
-        logger.info(f"Started change detection (polling every {self.polling_interval} minutes)")
+        logger.info(
+            "Started change detection (polling every %s to %s minutes)",
+            self.polling_interval,
+            self.max_polling_interval,
+        )
     
     def stop(self) -> None:
-        """Stop the polling scheduler."""
-        if self._scheduler:
-            self._scheduler.shutdown(wait=False)
-            self._scheduler = None
+        """Stop the polling loop."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for task in self._check_tasks:
+            task.cancel()
+        if self._event_worker:
+            self._event_worker.cancel()
+            self._event_worker = None
+        self._schedule.clear()
+        self._next_run.clear()
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        if self._state_generation != self._written_generation:
+            # Waits for a write still running in a worker thread, then supersedes it
+            self._write_state(self._snapshot_state(), self._state_generation)
+        self._flush_task = None
         self._is_running = False
         logger.info("Stopped change detection")
     
@@ -201,34 +500,147 @@ class FigmaChangeDetector:
     
     def load_watched_files_from_config(self) -> None:
         """Load watched files from configuration."""
-        for file_config in settings.figma.watched_files:
-            self.add_watched_file(file_config.file_key, file_config.name)
+        watched_files = settings.figma.watched_files
+        self._watched_files.update({
+            file_config.file_key: self._new_state(file_config.file_key, file_config.name)
+            for file_config in watched_files
+        })
+        logger.info("Loaded %d watched files from config", len(watched_files))
+    
+    def _load_state(self) -> None:
+        """Restore persisted versions and ETags of watched files."""
+        try:
+            data = orjson.loads(self._state_path.read_bytes())
+        except FileNotFoundError:
+            return
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning("Could not read watch state %s: %s", self._state_path, e)
+            return
+        
+        now = time.time()
+        now_monotonic = time.monotonic()
+        for file_key, entry in data.items():
+            watched = self._watched_files.get(file_key)
+            if watched is None:
+                continue
+            try:
+                modified = entry.get("modified")
+                last_modified = datetime.fromisoformat(modified) if modified else None
+                checked_at = now_monotonic - (now - float(entry["checked_at"]))
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                logger.warning("Skipping invalid watch state for %s: %r", file_key, e)
+                continue
+            watched.last_version = entry.get("version")
+            watched.last_modified = last_modified
+            watched.etag = entry.get("etag")
+            watched.last_modified_header = entry.get("last_modified_header")
+            watched.doc_generated = entry.get("doc_generated", False)
+            watched.last_checked_monotonic = checked_at
+    
+    def _snapshot_state(self) -> dict[str, dict[str, Any]]:
+        """Build the persistable state of all checked watched files."""
+        now = time.time()
+        now_monotonic = time.monotonic()
+        return {
+            watched.file_key: {
+                "version": watched.last_version,
+                "modified": watched.last_modified.isoformat() if watched.last_modified else None,
+                "etag": watched.etag,
+                "last_modified_header": watched.last_modified_header,
+                "doc_generated": watched.doc_generated,
+                "checked_at": now - (now_monotonic - watched.last_checked_monotonic),
+            }
+            for watched in self._watched_files.values()
+            if watched.last_checked_monotonic is not None
+        }
+    
+    def _write_state(self, data: dict[str, dict[str, Any]], generation: int) -> None:
+        """Atomically replace the state file, unless a newer snapshot was written.
+        
+        Args:
+            data: State snapshot from _snapshot_state.
+            generation: Value of _state_generation when the snapshot was taken.
+        """
+        with self._state_write_lock:
+            if generation <= self._written_generation:
+                return
+            tmp_path = self._state_path.with_name(self._state_path.name + ".tmp")
+            try:
+                self._state_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path.write_bytes(orjson.dumps(data))
+                os.replace(tmp_path, self._state_path)
+            except OSError as e:
+                logger.warning("Could not write watch state %s: %s", self._state_path, e)
+                return
+            self._written_generation = generation
+    
+    def _schedule_state_flush(self) -> None:
+        """Mark the watch state changed and schedule a debounced write."""
+        self._state_generation += 1
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_state_later())
+    
+    async def _flush_state_later(self) -> None:
+        """Write the watch state after the debounce delay, off the event loop.
+        
+        Changes made while a write is running are flushed by another round.
+        """
+        while True:
+            await asyncio.sleep(_STATE_FLUSH_DELAY)
+            generation = self._state_generation
+            await asyncio.to_thread(self._write_state, self._snapshot_state(), generation)
+            if self._state_generation == generation:
+                return
     
     async def initialize(self) -> None:
-        """Initialize the change detector with config and perform initial check."""
+        """Initialize the change detector with config and perform initial check.
+        
+        Files whose persisted state is younger than state_ttl_seconds are not
+        re-fetched.
+        """
         self.load_watched_files_from_config()
+        self._load_state()
         
-        # Perform initial check to get current versions
-        for file_key, watched in self._watched_files.items():
-            try:
-                _, version, modified = await self.figma_service.check_file_changed(file_key)
-                if version:
-                    watched.last_version = version
-                    watched.last_modified = modified
-                    watched.last_checked = datetime.now()
-                    logger.info(f"Initialized {watched.name}: version {version}")
-            except Exception as e:
-                logger.error(f"Error initializing file {file_key}: {e}")
-
-
-# Global change detector instance
-change_detector: Optional[FigmaChangeDetector] = None
+        # Perform initial check to get current versions in one concurrent batch
+        now_monotonic = time.monotonic()
+        watched_files = [
+            watched
+            for watched in self._watched_files.values()
+            if watched.last_checked_monotonic is None
+            or now_monotonic - watched.last_checked_monotonic > self._state_ttl
+        ]
+        if not watched_files:
+            return
+        
+        results = await self.figma_service.check_files_changed([
+            (
+                watched.file_key,
+                watched.last_version,
+                watched.last_modified,
+                watched.etag,
+                watched.last_modified_header,
+            )
+            for watched in watched_files
+        ])
+        
+        checked_at = time.monotonic()
+        for watched in watched_files:
+            result = results.get(watched.file_key)
+            if result is None:
+                continue
+            _, version, modified, etag, last_modified_header = result
+            if version:
+                watched.last_version = version
+                watched.last_modified = modified
+                watched.etag = etag
+                watched.last_modified_header = last_modified_header
+                watched.last_checked_monotonic = checked_at
+                logger.info("Initialized %s: version %s", watched.name, version)
+        
+        self._schedule_state_flush()
 
 
+@functools.cache
 def get_change_detector() -> FigmaChangeDetector:
     """Get or create the global change detector instance."""
-    global change_detector
-    if change_detector is None:
-        change_detector = FigmaChangeDetector()
-    return change_detector
-
+    return FigmaChangeDetector()
@@ -1,10 +1,15 @@
 """Figma API service for interacting with Figma files."""
 
+import asyncio
+import hashlib
 import logging
+import random
+from collections import defaultdict
 from datetime import datetime
 from typing import Any, Optional
 
 import httpx
+import orjson
 
 from app.core.config import settings
 from app.models.figma_models import (
@@ -17,6 +22,102 @@ from app.models.figma_models import (
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of image CDN downloads in flight per download_images call
+_MAX_CONCURRENT_DOWNLOADS = 16
+
+# Node IDs per /v1/images render request, and render requests in flight
+_IMAGE_IDS_PER_REQUEST = 30
+_MAX_CONCURRENT_RENDERS = 4
+
+# Response cache: every reuse is revalidated with the entry's ETag
+_CACHE_MAX_ENTRIES = 256
+
+# Largest page_size the Figma versions endpoint accepts
+_MAX_VERSIONS_PAGE_SIZE = 50
+
+# Node types whose children are extracted as nested frames
+_CONTAINER_TYPES = frozenset({"FRAME", "GROUP"})
+
+# Number of extracted design info results kept per service instance
+_DESIGN_INFO_CACHE_SIZE = 32
+
+# Error messages raised by get_file, keyed by HTTP status code
+_FILE_ERROR_TEMPLATES: dict[int, str] = {
+    400: (
+        "Could not access Figma file '{file_key}': {detail}. "
+        "Check that the file key is correct and your API token has access to this file."
+    ),
+    403: (
+        "Access denied to Figma file '{file_key}': {detail}. "
+        "Your API token may not have permission to access this file."
+    ),
+    404: (
+        "Figma file '{file_key}' not found: {detail}. "
+        "Check that the file key is correct."
+    ),
+}
+_UNSUPPORTED_FILE_TEMPLATE = (
+    "File type not supported: The file '{file_key}' appears to be a FigJam file or another unsupported file type. "
+    "This tool only supports Figma Design files. Please use a Figma Design file (.fig) instead of a FigJam file."
+)
+
+
+class _RetryTransport(httpx.AsyncBaseTransport):
+    """Transport that retries rate-limited and unavailable responses.
+    
+    Idempotent requests answered with 429/502/503/504 are retried with
+    exponential backoff and jitter, honoring a numeric Retry-After header.
+    """
+    
+    RETRY_STATUSES = frozenset({429, 502, 503, 504})
+    RETRY_METHODS = frozenset({"GET", "HEAD"})
+    
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+    ):
+        self._transport = transport
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            response = await self._transport.handle_async_request(request)
+            if (
+                attempt >= self._max_retries
+                or response.status_code not in self.RETRY_STATUSES
+                or request.method not in self.RETRY_METHODS
+            ):
+                return response
+            
+            delay = self._retry_delay(response, attempt)
+            await response.aclose()
+            attempt += 1
+            logger.warning(
+                f"Figma request {request.url.path} returned {response.status_code}, "
+                f"retrying in {delay:.1f}s ({attempt}/{self._max_retries})"
+            )
+            await asyncio.sleep(delay)
+    
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Get the delay before the next attempt."""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), self._backoff_cap)
+            except ValueError:
+                pass
+        delay = min(self._backoff_cap, self._backoff_base * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.5)
+    
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
 
 class FigmaService:
     """Service for interacting with Figma REST API."""
@@ -29,15 +130,35 @@ class FigmaService:
         """
         self.api_token = api_token or settings.figma.api_token
         self.base_url = settings.figma.api_base_url
+        self._headers: dict[str, str] = {}
+        self._headers_token: Optional[str] = None
         self._client: Optional[httpx.AsyncClient] = None
+        self._cdn_client: Optional[httpx.AsyncClient] = None
+        
+        # Bounds concurrent change checks against the Figma API
+        self._check_semaphore = asyncio.Semaphore(settings.figma.max_concurrent_checks)
+        
+        # (path, params) -> (etag, decoded value), oldest first
+        self._response_cache: dict[tuple, tuple[str, Any]] = {}
+        
+        # (file_key, version) -> (source document, extracted design info), oldest first
+        self._design_info_cache: dict[
+            tuple[str, str], tuple[Optional[FigmaNode], dict[str, Any]]
+        ] = {}
+        
+        # file_key -> (etag, body digest, version, last modified) of the last change check
+        self._check_meta: dict[str, tuple[Optional[str], bytes, str, datetime]] = {}
     
     @property
     def headers(self) -> dict[str, str]:
-        """Get headers for API requests."""
-        return {
-            "X-Figma-Token": self.api_token,
-            "Content-Type": "application/json",
-        }
+        """Get headers for API requests, rebuilt only if the token changes."""
+        if self._headers_token != self.api_token:
+            self._headers = {
+                "X-Figma-Token": self.api_token,
+                "Content-Type": "application/json",
+            }
+            self._headers_token = self.api_token
+        return self._headers
     
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client."""
@@ -46,13 +167,93 @@ class FigmaService:
                 base_url=self.base_url,
                 headers=self.headers,
                 timeout=30.0,
+                transport=_RetryTransport(
+                    httpx.AsyncHTTPTransport(
+                        http2=True,
+                        limits=httpx.Limits(
+                            max_connections=64,
+                            max_keepalive_connections=32,
+                            keepalive_expiry=60.0,
+                        ),
+                    )
+                ),
             )
         return self._client
     
+    async def _get_cdn_client(self) -> httpx.AsyncClient:
+        """Get or create the HTTP client for image CDN downloads."""
+        if self._cdn_client is None or self._cdn_client.is_closed:
+            self._cdn_client = httpx.AsyncClient(
+                timeout=60.0,
+                transport=_RetryTransport(
+                    httpx.AsyncHTTPTransport(
+                        http2=True,
+                        limits=httpx.Limits(
+                            max_connections=_MAX_CONCURRENT_DOWNLOADS * 2,
+                            max_keepalive_connections=_MAX_CONCURRENT_DOWNLOADS * 2,
+                        ),
+                    )
+                ),
+            )
+        return self._cdn_client
+    
     async def close(self) -> None:
-        """Close the HTTP client."""
+        """Close the HTTP clients."""
         if self._client and not self._client.is_closed:
             await self._client.aclose()
+        if self._cdn_client and not self._cdn_client.is_closed:
+            await self._cdn_client.aclose()
+    
+    def _cache_put(self, key: tuple, etag: Optional[str], value: Any) -> None:
+        """Store a response in the cache, evicting the oldest entry when full.
+        
+        Responses without an ETag cannot be revalidated and are not stored.
+        
+        Args:
+            key: Cache key from _cache_key.
+            etag: ETag header of the response, if any.
+            value: Decoded response value.
+        """
+        self._response_cache.pop(key, None)
+        if not etag:
+            return
+        if len(self._response_cache) >= _CACHE_MAX_ENTRIES:
+            del self._response_cache[next(iter(self._response_cache))]
+        self._response_cache[key] = (etag, value)
+    
+    @staticmethod
+    def _cache_key(path: str, params: Optional[dict[str, Any]]) -> tuple:
+        """Build the response cache key for a request."""
+        return (path, tuple(sorted(params.items())) if params else ())
+    
+    async def _get_json(self, path: str, params: Optional[dict[str, Any]] = None) -> Any:
+        """GET a JSON endpoint through the response cache.
+        
+        Cached entries are always revalidated with If-None-Match and reused
+        on 304 Not Modified.
+        
+        Args:
+            path: API path relative to the base URL.
+            params: Query parameters.
+            
+        Returns:
+            Decoded JSON response. Callers must not mutate it.
+        """
+        key = self._cache_key(path, params)
+        entry = self._response_cache.get(key)
+        headers = {"If-None-Match": entry[0]} if entry is not None else {}
+        client = await self._get_client()
+        response = await client.get(path, params=params, headers=headers)
+        
+        if entry is not None and response.status_code == 304:
+            self._cache_put(key, *entry)
+            return entry[1]
+        
+        response.raise_for_status()
+        
+        data = orjson.loads(response.content)
+        self._cache_put(key, response.headers.get("ETag"), data)
+        return data
     
     async def get_me(self) -> dict[str, Any]:
         """Get current user info to verify API token.
@@ -65,7 +266,7 @@ class FigmaService:
         response = await client.get("/v1/me")
         response.raise_for_status()
         
-        return response.json()
+        return orjson.loads(response.content)
     
     async def get_team_projects(self, team_id: str) -> list[dict[str, Any]]:
         """Get all projects in a team.
@@ -76,12 +277,7 @@ class FigmaService:
         Returns:
             List of project dictionaries with id and name.
         """
-        client = await self._get_client()
-        
-        response = await client.get(f"/v1/teams/{team_id}/projects")
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await self._get_json(f"/v1/teams/{team_id}/projects")
         projects = []
         
         for project in data.get("projects", []):
@@ -101,12 +297,7 @@ class FigmaService:
         Returns:
             List of file dictionaries with key, name, thumbnail_url, last_modified.
         """
-        client = await self._get_client()
-        
-        response = await client.get(f"/v1/projects/{project_id}/files")
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await self._get_json(f"/v1/projects/{project_id}/files")
         files = []
         
         for file_data in data.get("files", []):
@@ -121,15 +312,27 @@ class FigmaService:
         
         return files
     
-    async def get_file(self, file_key: str, version: Optional[str] = None) -> FigmaFile:
+    async def get_file(
+        self,
+        file_key: str,
+        version: Optional[str] = None,
+        depth: Optional[int] = None,
+        ids: Optional[list[str]] = None,
+        branch_data: bool = False,
+    ) -> FigmaFile:
         """Get a Figma file by key.
         
         Args:
             file_key: The unique key of the Figma file.
             version: Optional specific version to retrieve.
+            depth: Optional depth to which the document tree is returned
+                (1 returns pages only).
+            ids: Optional node IDs to restrict the document tree to.
+            branch_data: Whether to include branch metadata.
             
         Returns:
-            FigmaFile object with file data.
+            FigmaFile object with file data. An unchanged file is returned as
+            the same cached object, which callers must not mutate.
             
         Raises:
             httpx.HTTPStatusError: If the API request fails.
@@ -149,91 +352,127 @@ class FigmaService:
         
         client = await self._get_client()
         
-        params = {}
+        params: dict[str, Any] = {}
         if version:
             params["version"] = version
+        if depth is not None:
+            params["depth"] = depth
+        if ids:
+            params["ids"] = ",".join(ids)
+        if branch_data:
+            params["branch_data"] = "true"
         
         logger.info(f"Fetching Figma file: {file_key} (version: {version or 'latest'})")
         
+        # Revalidate a cached response with its ETag; 304 reuses the parsed file
+        cache_key = self._cache_key(f"/v1/files/{file_key}", params)
+        entry = self._response_cache.get(cache_key)
+        headers = {"If-None-Match": entry[0]} if entry is not None else {}
+        
         try:
-            response = await client.get(f"/v1/files/{file_key}", params=params)
+            response = await client.get(f"/v1/files/{file_key}", params=params, headers=headers)
+            if entry is not None and response.status_code == 304:
+                self._cache_put(cache_key, *entry)
+                return entry[1]
             response.raise_for_status()
         except httpx.HTTPStatusError as e:
             # Log detailed error information
             error_detail = "Unknown error"
             try:
-                error_data = e.response.json()
+                error_data = orjson.loads(e.response.content)
                 error_detail = error_data.get("err", error_data.get("message", str(e.response.text)))
-            except:
+            except (ValueError, AttributeError, httpx.DecodingError):
                 error_detail = e.response.text[:500] if e.response.text else str(e)
             
             logger.error(
                 f"Figma API error for file {file_key}: {e.response.status_code} - {error_detail}"
             )
-            
-            # Provide more helpful error messages
-            if e.response.status_code == 400:
-                # Check if it's a file type issue (e.g., FigJam)
-                if "file type not supported" in error_detail.lower() or "not supported by this endpoint" in error_detail.lower():
-                    raise httpx.HTTPStatusError(
-                        f"File type not supported: The file '{file_key}' appears to be a FigJam file or another unsupported file type. "
-                        f"This tool only supports Figma Design files. Please use a Figma Design file (.fig) instead of a FigJam file.",
-                        request=e.request,
-                        response=e.response,
-                    ) from e
-                else:
-                    raise httpx.HTTPStatusError(
-                        f"Could not access Figma file '{file_key}': {error_detail}. "
-                        f"Check that the file key is correct and your API token has access to this file.",
-                        request=e.request,
-                        response=e.response,
-                    ) from e
-            elif e.response.status_code == 403:
-                raise httpx.HTTPStatusError(
-                    f"Access denied to Figma file '{file_key}': {error_detail}. "
-                    f"Your API token may not have permission to access this file.",
-                    request=e.request,
-                    response=e.response,
-                ) from e
-            elif e.response.status_code == 404:
-                raise httpx.HTTPStatusError(
-                    f"Figma file '{file_key}' not found: {error_detail}. "
-                    f"Check that the file key is correct.",
-                    request=e.request,
-                    response=e.response,
-                ) from e
-            else:
-                raise
-        
-        data = response.json()
-        
-        # Parse document tree
+            self._raise_file_error(e, file_key, str(error_detail))
+            raise
+
+        data = orjson.loads(response.content)
         document = self._parse_node(data.get("document", {}))
+        components = self._parse_components(data.get("components", {}))
         
-        # Parse components
-        components = {}
-        for comp_id, comp_data in data.get("components", {}).items():
-            components[comp_id] = FigmaComponent(
-                key=comp_data.get("key", comp_id),
-                name=comp_data.get("name", ""),
-                description=comp_data.get("description"),
-                node_id=comp_id,
-                containing_frame=comp_data.get("containingFrame"),
-            )
-        
-        return FigmaFile(
+        figma_file = FigmaFile(
             key=file_key,
             name=data.get("name", ""),
-            last_modified=datetime.fromisoformat(data["lastModified"].replace("Z", "+00:00")),
+            last_modified=datetime.fromisoformat(data["lastModified"]),
             version=data.get("version", ""),
             thumbnail_url=data.get("thumbnailUrl"),
             document=document,
             components=components,
             styles=data.get("styles", {}),
         )
+        self._cache_put(cache_key, response.headers.get("ETag"), figma_file)
+        return figma_file
+    
+    @staticmethod
+    def _raise_file_error(e: httpx.HTTPStatusError, file_key: str, error_detail: str) -> None:
+        """Raise a descriptive error for a failed file request.
+    
+        Returns without raising for status codes that have no message template.
+    
+        Args:
+            e: The original HTTP status error
+            file_key: Figma file key
+            error_detail: Error detail reported by the Figma API
+        """
+        status = e.response.status_code
+        template = _FILE_ERROR_TEMPLATES.get(status)
+        if template is None:
+            return
+    
+        # Check if it's a file type issue (e.g., FigJam)
+        detail_lower = error_detail.lower()
+        if status == 400 and (
+            "file type not supported" in detail_lower
+            or "not supported by this endpoint" in detail_lower
+        ):
+            template = _UNSUPPORTED_FILE_TEMPLATE
+    
+        raise httpx.HTTPStatusError(
+            template.format(file_key=file_key, detail=error_detail),
+            request=e.request,
+            response=e.response,
+        ) from e
+    
+    async def get_file_shallow(self, file_key: str) -> FigmaFile:
+        """Get a Figma file's metadata and page list without the node tree.
+        
+        Args:
+            file_key: The unique key of the Figma file.
+            
+        Returns:
+            FigmaFile whose document contains pages but no page children.
+        """
+        return await self.get_file(file_key, depth=1)
+    
+    def _parse_components(self, components_data: dict[str, Any]) -> dict[str, FigmaComponent]:
+        """Parse the components map of a file response.
+        
+        Args:
+            components_data: Raw components data from API, keyed by node ID.
+            
+        Returns:
+            Dictionary of component ID to FigmaComponent.
+        """
+        components = {}
+        for comp_id, comp_data in components_data.items():
+            components[comp_id] = FigmaComponent.model_construct(
+                key=comp_data.get("key", comp_id),
+                name=comp_data.get("name", ""),
+                description=comp_data.get("description"),
+                node_id=comp_id,
+                containing_frame=comp_data.get("containingFrame"),
+            )
+        return components
     
     def _parse_node(self, node_data: dict[str, Any]) -> FigmaNode:
-        """Recursively parse a Figma node.
+        """Parse a Figma node tree.
+        
+        Walks the tree with an explicit stack instead of recursion, so deep
+        documents cannot hit the recursion limit.
         
         Args:
             node_data: Raw node data from API.
@@ -241,27 +480,43 @@ class FigmaService:
         Returns:
             Parsed FigmaNode object.
         """
-        children = []
-        for child_data in node_data.get("children", []):
-            children.append(self._parse_node(child_data))
-        
-        return FigmaNode(
-            id=node_data.get("id", ""),
-            name=node_data.get("name", ""),
-            type=node_data.get("type", ""),
-            children=children,
-            visible=node_data.get("visible", True),
-            background_color=node_data.get("backgroundColor"),
-            fills=node_data.get("fills", []),
-            strokes=node_data.get("strokes", []),
-            effects=node_data.get("effects", []),
-            absolute_bounding_box=node_data.get("absoluteBoundingBox"),
-            constraints=node_data.get("constraints"),
-            layout_mode=node_data.get("layoutMode"),
-            characters=node_data.get("characters"),
-            style=node_data.get("style"),
-            component_id=node_data.get("componentId"),
-        )
+        # Fields come straight from the API with the types the model declares,
+        # so skip per-node validation
+        construct = FigmaNode.model_construct
+        roots: list[FigmaNode] = []
+        # (list the parsed node is appended to, raw node data)
+        stack = [(roots, node_data)]
+        pop = stack.pop
+        push = stack.append
+        
+        while stack:
+            siblings, data = pop()
+            get = data.get
+            node = construct(
+                id=get("id", ""),
+                name=get("name", ""),
+                type=get("type", ""),
+                visible=get("visible", True),
+                background_color=get("backgroundColor"),
+                fills=get("fills", []),
+                strokes=get("strokes", []),
+                effects=get("effects", []),
+                absolute_bounding_box=get("absoluteBoundingBox"),
+                constraints=get("constraints"),
+                layout_mode=get("layoutMode"),
+                characters=get("characters"),
+                style=get("style"),
+                component_id=get("componentId"),
+                children=[],
+            )
+            siblings.append(node)
+            
+            # Push in reverse so children are popped, and appended, in order
+            children = node.children
+            for child_data in reversed(get("children", ())):
+                push((children, child_data))
+        
+        return roots[0]
     
     async def get_file_versions(
         self,
@@ -277,15 +532,20 @@ class FigmaService:
         Returns:
             List of FigmaVersion objects.
         """
-        client = await self._get_client()
-        
-        response = await client.get(f"/v1/files/{file_key}/versions")
-        response.raise_for_status()
-        
-        data = response.json()
+        # Figma pages version history; ask only for the page size we need
+        data = await self._get_json(
+            f"/v1/files/{file_key}/versions",
+            params={"page_size": min(limit, _MAX_VERSIONS_PAGE_SIZE)},
+        )
         versions = []
         
         for version_data in data.get("versions", [])[:limit]:
+            try:
+                created_at = datetime.fromisoformat(version_data["created_at"])
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping version of file {file_key} without a valid created_at: {e!r}")
+                continue
+            
             user = None
             if version_data.get("user"):
                 user = FigmaUser(
@@ -296,9 +556,7 @@ class FigmaService:
             
             versions.append(FigmaVersion(
                 id=version_data.get("id", ""),
-                created_at=datetime.fromisoformat(
-                    version_data["created_at"].replace("Z", "+00:00")
-                ),
+                created_at=created_at,
                 label=version_data.get("label"),
                 description=version_data.get("description"),
                 user=user,
@@ -315,12 +573,7 @@ class FigmaService:
         Returns:
             Dictionary of component ID to FigmaComponent.
         """
-        client = await self._get_client()
-        
-        response = await client.get(f"/v1/files/{file_key}/components")
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await self._get_json(f"/v1/files/{file_key}/components")
         components = {}
         
         for comp_data in data.get("meta", {}).get("components", []):
@@ -344,13 +597,8 @@ class FigmaService:
         Returns:
             Dictionary of style ID to style data.
         """
-        client = await self._get_client()
-        
-        response = await client.get(f"/v1/files/{file_key}/styles")
-        response.raise_for_status()
-        
-        data = response.json()
-        return data.get("meta", {}).get("styles", {})
+        data = await self._get_json(f"/v1/files/{file_key}/styles")
+        return dict(data.get("meta", {}).get("styles", {}))
     
     async def get_images(
         self,
@@ -367,22 +615,37 @@ class FigmaService:
             format: Image format (png, jpg, svg, pdf).
             scale: Scale factor for the image.
             
+        Node IDs are requested in chunks of _IMAGE_IDS_PER_REQUEST, rendered
+        concurrently, to stay within Figma's URL length and render limits.
+        
         Returns:
             Dictionary of node ID to image URL.
         """
         client = await self._get_client()
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_RENDERS)
         
-        params = {
-            "ids": ",".join(node_ids),
-            "format": format,
-            "scale": scale,
-        }
-        
-        response = await client.get(f"/v1/images/{file_key}", params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        return data.get("images", {})
+        async def render(chunk: list[str]) -> dict[str, str]:
+            params = {
+                "ids": ",".join(chunk),
+                "format": format,
+                "scale": scale,
+            }
+            async with semaphore:
+                response = await client.get(f"/v1/images/{file_key}", params=params)
+            response.raise_for_status()
+            
+            data = orjson.loads(response.content)
+            return data.get("images") or {}
+        
+        parts = await asyncio.gather(*(
+            render(node_ids[i:i + _IMAGE_IDS_PER_REQUEST])
+            for i in range(0, len(node_ids), _IMAGE_IDS_PER_REQUEST)
+        ))
+        
+        images: dict[str, str] = {}
+        for part in parts:
+            images.update(part)
+        return images
     
     async def download_images(
         self,
@@ -405,24 +668,37 @@ class FigmaService:
         # Get image URLs from Figma API
         image_urls = await self.get_images(file_key, node_ids, format, scale)
         
-        # Download each image
-        downloaded_images: dict[str, bytes] = {}
+        # Download all images concurrently over one pooled client
+        client = await self._get_cdn_client()
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_DOWNLOADS)
+        
+        async def fetch(node_id: str, image_url: str) -> bytes:
+            async with semaphore:
+                # Download image from CDN (no auth needed for Figma CDN)
+                response = await client.get(image_url)
+                response.raise_for_status()
+                logger.debug(f"Downloaded image for node {node_id} ({len(response.content)} bytes)")
+                return response.content
+        
+        downloads: dict[str, str] = {}
+        for node_id, image_url in image_urls.items():
+            if image_url:
+                downloads[node_id] = image_url
+            else:
+                logger.warning(f"No image URL returned for node {node_id}")
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            for node_id, image_url in image_urls.items():
-                if not image_url:
-                    logger.warning(f"No image URL returned for node {node_id}")
-                    continue
-                
-                try:
-                    # Download image from CDN (no auth needed for Figma CDN)
-                    response = await client.get(image_url)
-                    response.raise_for_status()
-                    downloaded_images[node_id] = response.content
-                    logger.debug(f"Downloaded image for node {node_id} ({len(response.content)} bytes)")
-                except Exception as e:
-                    logger.error(f"Error downloading image for node {node_id}: {e}")
-                    # Continue with other images even if one fails
+        results = await asyncio.gather(
+            *(fetch(node_id, image_url) for node_id, image_url in downloads.items()),
+            return_exceptions=True,
+        )
+        
+        downloaded_images: dict[str, bytes] = {}
+        for node_id, result in zip(downloads, results):
+            if isinstance(result, Exception):
+                # Continue with other images even if one fails
+                logger.error(f"Error downloading image for node {node_id}: {result}")
+            else:
+                downloaded_images[node_id] = result
         
         return downloaded_images
     
@@ -454,17 +730,75 @@ class FigmaService:
         Returns:
             Tuple of (has_changed, new_version, new_modified_time).
         """
+        has_changed, version, modified, _, _ = await self.check_file_changed_conditional(
+            file_key, last_known_version, last_known_modified
+        )
+        return has_changed, version, modified
+    
+    async def check_file_changed_conditional(
+        self,
+        file_key: str,
+        last_known_version: Optional[str] = None,
+        last_known_modified: Optional[datetime] = None,
+        etag: Optional[str] = None,
+        if_modified_since: Optional[str] = None,
+    ) -> tuple[bool, Optional[str], Optional[datetime], Optional[str], Optional[str]]:
+        """Check if a Figma file has changed using a conditional request.
+        
+        Sends If-None-Match / If-Modified-Since so an unchanged file is
+        answered with an empty 304 instead of the file JSON.
+        
+        Args:
+            file_key: The unique key of the Figma file.
+            last_known_version: Last known version ID.
+            last_known_modified: Last known modification timestamp.
+            etag: ETag from the previous response.
+            if_modified_since: Last-Modified header from the previous response.
+            
+        Returns:
+            Tuple of (has_changed, new_version, new_modified_time, etag, last_modified_header).
+        """
+        # Without a caller ETag, revalidate against the one this service last saw
+        cached = self._check_meta.get(file_key)
+        sent_etag = etag or (cached[0] if cached is not None else None)
+        
+        headers = {}
+        if sent_etag:
+            headers["If-None-Match"] = sent_etag
+        if if_modified_since:
+            headers["If-Modified-Since"] = if_modified_since
+        
         try:
             # Get file metadata (lighter than full file)
             client = await self._get_client()
-            response = await client.get(f"/v1/files/{file_key}", params={"depth": 1})
-            response.raise_for_status()
+            async with self._check_semaphore:
+                response = await client.get(
+                    f"/v1/files/{file_key}", params={"depth": 1}, headers=headers
+                )
             
-            data = response.json()
-            current_version = data.get("version", "")
-            current_modified = datetime.fromisoformat(
-                data["lastModified"].replace("Z", "+00:00")
-            )
+            if response.status_code == 304:
+                if cached is None or cached[0] != sent_etag:
+                    return False, last_known_version, last_known_modified, etag, if_modified_since
+                # Not modified since our own last check: reuse its version info
+                _, _, current_version, current_modified = cached
+                response_etag = sent_etag
+                response_last_modified = if_modified_since
+            else:
+                response.raise_for_status()
+                response_etag = response.headers.get("ETag")
+                response_last_modified = response.headers.get("Last-Modified")
+                
+                # Identical body to the last check: reuse its parsed version info
+                digest = hashlib.blake2b(response.content, digest_size=16).digest()
+                if cached is not None and cached[1] == digest:
+                    _, _, current_version, current_modified = cached
+                else:
+                    data = orjson.loads(response.content)
+                    current_version = data.get("version", "")
+                    current_modified = datetime.fromisoformat(data["lastModified"])
+                self._check_meta[file_key] = (
+                    response_etag, digest, current_version, current_modified
+                )
             
             has_changed = False
             
@@ -476,63 +810,123 @@ class FigmaService:
                 # First check, consider it changed
                 has_changed = True
             
-            return has_changed, current_version, current_modified
+            return (
+                has_changed,
+                current_version,
+                current_modified,
+                response_etag,
+                response_last_modified,
+            )
             
-        except Exception as e:
-            logger.error(f"Error checking file changes for {file_key}: {e}")
-            return False, None, None
+        except (httpx.HTTPError, TimeoutError, KeyError, ValueError):
+            # Network/HTTP failures and malformed metadata; let cancellation propagate
+            logger.exception(f"Error checking file changes for {file_key}")
+            return False, None, None, etag, if_modified_since
+    
+    async def check_files_changed(
+        self,
+        files: list[tuple[str, Optional[str], Optional[datetime], Optional[str], Optional[str]]],
+    ) -> dict[str, tuple[bool, Optional[str], Optional[datetime], Optional[str], Optional[str]]]:
+        """Check several Figma files for changes in one batch.
+        
+        Requests run concurrently over the shared client connection pool,
+        bounded by the configured max_concurrent_checks.
+        
+        Args:
+            files: Tuples of (file_key, last_known_version, last_known_modified,
+                etag, if_modified_since).
+            
+        Returns:
+            Dictionary of file key to the check_file_changed_conditional tuple.
+            Files whose check raised are logged and left out.
+        """
+        results = await asyncio.gather(*(
+            self.check_file_changed_conditional(
+                file_key,
+                last_version,
+                last_modified,
+                etag=etag,
+                if_modified_since=if_modified_since,
+            )
+            for file_key, last_version, last_modified, etag, if_modified_since in files
+        ), return_exceptions=True)
+        
+        checked = {}
+        for (file_key, *_), result in zip(files, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error checking file changes for {file_key}", exc_info=result)
+            else:
+                checked[file_key] = result
+        return checked
     
     def extract_design_info(self, file: FigmaFile) -> dict[str, Any]:
         """Extract structured design information from a Figma file.
         
+        Results are memoized per (file key, version) and reused only for the
+        same parsed document, so a depth- or ids-limited fetch of a version
+        never answers for a full one. The memoized dictionary is shared
+        between callers and must not be mutated.
+        
         Args:
             file: FigmaFile object.
             
         Returns:
             Dictionary with extracted design information.
         """
-        info = {
-            "file_name": file.name,
-            "file_key": file.key,
-            "last_modified": file.last_modified.isoformat(),
-            "version": file.version,
-            "pages": [],
-            "components": [],
-            "styles": [],
-            "colors": [],
-            "typography": [],
-        }
-        
-        if file.document:
-            # Extract pages (top-level children of document)
-            for page in file.document.children:
-                page_info = self._extract_page_info(page)
-                info["pages"].append(page_info)
+        cache_key = (file.key, file.version)
+        cached = self._design_info_cache.get(cache_key)
+        if cached is not None and cached[0] is file.document:
+            return cached[1]
+        
+        # Extract pages (top-level children of document)
+        pages = (
+            [self._extract_page_info(page) for page in file.document.children]
+            if file.document
+            else []
+        )
         
         # Extract components
-        for comp_id, comp in file.components.items():
-            info["components"].append({
+        components = [
+            {
                 "id": comp_id,
                 "key": comp.key,
                 "name": comp.name,
                 "description": comp.description,
-            })
+            }
+            for comp_id, comp in file.components.items()
+        ]
         
-        # Extract styles
+        # Extract styles, grouping them by type in the same pass
+        styles: list[dict[str, Any]] = []
+        styles_by_type: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+        styles_append = styles.append
         for style_id, style in file.styles.items():
+            style_type = style.get("styleType", "")
             style_info = {
                 "id": style_id,
                 "name": style.get("name", ""),
-                "type": style.get("styleType", ""),
+                "type": style_type,
                 "description": style.get("description", ""),
             }
-            info["styles"].append(style_info)
-            
-            # Categorize styles
-            if style.get("styleType") == "FILL":
-                info["colors"].append(style_info)
-            elif style.get("styleType") == "TEXT":
-                info["typography"].append(style_info)
+            styles_append(style_info)
+            styles_by_type[style_type].append(style_info)
+        
+        info = {
+            "file_name": file.name,
+            "file_key": file.key,
+            "last_modified": file.last_modified.isoformat(),
+            "version": file.version,
+            "pages": pages,
+            "components": components,
+            "styles": styles,
+            "colors": styles_by_type["FILL"],
+            "typography": styles_by_type["TEXT"],
+        }
+        
+        self._design_info_cache.pop(cache_key, None)
+        if len(self._design_info_cache) >= _DESIGN_INFO_CACHE_SIZE:
+            del self._design_info_cache[next(iter(self._design_info_cache))]
+        self._design_info_cache[cache_key] = (file.document, info)
         
         return info
     
@@ -545,58 +939,69 @@ class FigmaService:
         Returns:
             Dictionary with page information.
         """
-        page_info = {
-            "id": page.id,
-            "name": page.name,
-            "type": page.type,
-            "frames": [],
-            "elements": [],
-        }
+        frames: list[dict[str, Any]] = []
+        elements: list[dict[str, Any]] = []
+        frames_append = frames.append
+        elements_append = elements.append
         
         for child in page.children:
             if child.type == "FRAME":
-                frame_info = self._extract_frame_info(child)
-                page_info["frames"].append(frame_info)
+                frames_append(self._extract_frame_info(child))
             else:
-                element_info = self._extract_element_info(child)
-                page_info["elements"].append(element_info)
+                elements_append(self._extract_element_info(child))
         
-        return page_info
+        return {
+            "id": page.id,
+            "name": page.name,
+            "type": page.type,
+            "frames": frames,
+            "elements": elements,
+        }
     
-    def _extract_frame_info(self, frame: FigmaNode, depth: int = 0) -> dict[str, Any]:
-        """Extract information from a frame node.
+    def _extract_frame_info(self, frame: FigmaNode) -> dict[str, Any]:
+        """Extract information from a frame node and all nested frames.
+        
+        Walks nested frames and groups with an explicit stack, so arbitrarily
+        deep designs are extracted in full without risking RecursionError.
         
         Args:
             frame: FigmaNode representing a frame.
-            depth: Current recursion depth.
             
         Returns:
             Dictionary with frame information.
         """
-        frame_info = {
-            "id": frame.id,
-            "name": frame.name,
-            "type": frame.type,
-            "layout_mode": frame.layout_mode,
-            "children": [],
-        }
-        
-        if frame.absolute_bounding_box:
-            frame_info["dimensions"] = {
-                "width": frame.absolute_bounding_box.get("width"),
-                "height": frame.absolute_bounding_box.get("height"),
+        extract_element_info = self._extract_element_info
+        roots: list[Any] = [None]
+        # (frame node, list its info goes into, index in that list)
+        stack = [(frame, roots, 0)]
+        
+        while stack:
+            node, siblings, index = stack.pop()
+            children: list[Any] = [None] * len(node.children)
+            frame_info = {
+                "id": node.id,
+                "name": node.name,
+                "type": node.type,
+                "layout_mode": node.layout_mode,
+                "children": children,
             }
-        
-        # Limit recursion depth
-        if depth < 5:
-            for child in frame.children:
-                if child.type == "FRAME" or child.type == "GROUP":
-                    child_info = self._extract_frame_info(child, depth + 1)
+            
+            if node.absolute_bounding_box:
+                frame_info["dimensions"] = {
+                    "width": node.absolute_bounding_box.get("width"),
+                    "height": node.absolute_bounding_box.get("height"),
+                }
+            
+            siblings[index] = frame_info
+            
+            # Elements are filled in directly; nested frames fill their slot when popped
+            for child_index, child in enumerate(node.children):
+                if child.type in _CONTAINER_TYPES:
+                    stack.append((child, children, child_index))
                 else:
-                    child_info = self._extract_element_info(child)
-                frame_info["children"].append(child_info)
+                    children[child_index] = extract_element_info(child)
         
-        return frame_info
+        return roots[0]
     
     def _extract_element_info(self, element: FigmaNode) -> dict[str, Any]:
         """Extract information from an element node.
@@ -614,19 +1019,23 @@ class FigmaService:
             "visible": element.visible,
         }
         
+        characters = element.characters
+        component_id = element.component_id
+        bounding_box = element.absolute_bounding_box
+        
         # Add text content if present
-        if element.characters:
-            element_info["text"] = element.characters
+        if characters:
+            element_info["text"] = characters
         
         # Add component reference if present
-        if element.component_id:
-            element_info["component_id"] = element.component_id
+        if component_id:
+            element_info["component_id"] = component_id
         
         # Add dimensions if present
-        if element.absolute_bounding_box:
+        if bounding_box:
             element_info["dimensions"] = {
-                "width": element.absolute_bounding_box.get("width"),
-                "height": element.absolute_bounding_box.get("height"),
+                "width": bounding_box.get("width"),
+                "height": bounding_box.get("height"),
             }
         
         return element_info
@@ -1,13 +1,21 @@
-"""LLM service for interacting with Ollama models via LangChain."""
+"""LLM service for interacting with Ollama models over its HTTP API."""
 
-import base64
+import asyncio
+import hashlib
+import itertools
 import logging
-from typing import Any, Optional
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Optional
 
 import httpx
-from langchain_ollama import OllamaLLM
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+import orjson
+
+# SIMD-accelerated base64 when installed; same API as the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 from app.core.config import settings
 
@@ -18,6 +26,81 @@ NGROK_HEADERS = {
     "ngrok-skip-browser-warning": "true",
 }
 
+# Response cache for identical generation requests, least recently used evicted first
+_RESPONSE_CACHE_TTL = 3600.0
+_RESPONSE_CACHE_MAX_ENTRIES = 1024
+
+# Seconds a fetched model list is reused before /api/tags is queried again
+_MODEL_LIST_TTL = 5.0
+
+# Model pulls run concurrently by ensure_models_available
+_MAX_CONCURRENT_PULLS = 2
+
+# Characters of source passed to analyze_code; longer files keep their head and tail
+_MAX_CODE_CHARS = 8000
+
+# Read size for streamed NDJSON responses
+_STREAM_CHUNK_SIZE = 65536
+
+
+def _encode_image(img_bytes: bytes) -> str:
+    """Base64-encode image bytes (the output is pure ASCII, so skip the UTF-8 codec)."""
+    return base64.b64encode(img_bytes).decode("ascii")
+
+
+def _truncate_code(code: str, limit: int) -> str:
+    """Limit code length, keeping both ends of long files.
+    
+    The head and tail are cut at line boundaries so no line is split, unless
+    a single line is longer than half the budget.
+    
+    Args:
+        code: Source code.
+        limit: Maximum number of characters to keep.
+        
+    Returns:
+        The code, or its head and tail around a truncation marker.
+    """
+    if len(code) <= limit:
+        return code
+    
+    half = limit // 2
+    head_end = code.rfind("\n", 0, half)
+    tail_start = code.find("\n", len(code) - half)
+    head = code[:head_end] if head_end > 0 else code[:half]
+    # A match on the final newline alone would leave an empty tail
+    tail = code[tail_start + 1:] if tail_start not in (-1, len(code) - 1) else code[-half:]
+    return f"{head}\n\n# ... [truncated] ...\n\n{tail}"
+
+
+async def _iter_ndjson(response: httpx.Response) -> AsyncIterator[dict[str, Any]]:
+    """Decode a streamed NDJSON response into objects.
+    
+    Lines that are not valid JSON are skipped.
+    
+    Args:
+        response: Streaming response to read.
+        
+    Yields:
+        Decoded JSON objects, one per line.
+    """
+    buffer = b""
+    async for chunk in response.aiter_bytes(_STREAM_CHUNK_SIZE):
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError:
+                logger.debug(f"Skipping malformed NDJSON line: {line[:200]!r}")
+    
+    if buffer.strip():
+        try:
+            yield orjson.loads(buffer)
+        except orjson.JSONDecodeError:
+            logger.debug(f"Skipping malformed NDJSON line: {buffer[:200]!r}")
+
 
 class LLMService:
     """Service for interacting with Ollama LLM models."""
@@ -35,45 +118,171 @@ class LLMService:
         """
         self.base_url = base_url or settings.llm.ollama_base_url
         self.default_model = model or settings.llm.default_model
-        self._models: dict[str, OllamaLLM] = {}
         
         # Check if using ngrok URL
         self._is_ngrok = "ngrok" in self.base_url.lower() if self.base_url else False
+        self._headers = dict(NGROK_HEADERS) if self._is_ngrok else {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        
+        # Request digest -> (expires_at, generated text), least recently used first
+        self._response_cache: dict[bytes, tuple[float, str]] = {}
+        
+        # Request digest -> result of the identical generation currently running
+        self._in_flight: dict[bytes, asyncio.Future] = {}
+        
+        # Model name -> bound on generations sent to Ollama at once
+        self._model_semaphores: dict[str, asyncio.Semaphore] = {}
+        
+        # (expires_at, models, names, untagged names) from the last /api/tags request
+        self._models_cache: Optional[
+            tuple[float, list[dict[str, Any]], frozenset[str], frozenset[str]]
+        ] = None
+        self._models_lock = asyncio.Lock()
+        self._tags_etag: Optional[str] = None
     
     def _get_headers(self) -> dict[str, str]:
-        """Get headers for Ollama requests (includes ngrok headers if needed)."""
-        if self._is_ngrok:
-            return NGROK_HEADERS.copy()
-        return {}
+        """Get headers for Ollama requests (includes ngrok headers if needed).
+        
+        Returns the shared dict built at init; callers must not mutate it.
+        """
+        return self._headers
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Get or create the HTTP client for the Ollama API.
+        
+        The client keeps connections alive across requests; per-request
+        timeouts override its 300s default where needed.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                # Request bodies are pre-encoded with orjson
+                headers={**self._get_headers(), "Content-Type": "application/json"},
+                timeout=httpx.Timeout(300.0, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=200,
+                    max_keepalive_connections=50,
+                ),
+                # Negotiated via ALPN on HTTPS (e.g. ngrok); plain HTTP stays on HTTP/1.1
+                http2=True,
+            )
+        return self._client
     
-    def _get_model(self, model_name: Optional[str] = None) -> OllamaLLM:
-        """Get or create an Ollama model instance.
+    async def warmup(self, n: int = 4) -> int:
+        """Open keep-alive connections to Ollama before real traffic arrives.
         
         Args:
-            model_name: Name of the model to get.
+            n: Number of connections to open.
             
         Returns:
-            OllamaLLM instance.
+            Number of warmup requests that succeeded.
         """
-        model = model_name or self.default_model
+        client = await self._get_client()
+        results = await asyncio.gather(
+            *(client.get("/api/tags", timeout=10.0) for _ in range(n)),
+            return_exceptions=True,
+        )
         
-        if model not in self._models:
-            self._models[model] = OllamaLLM(
-                model=model,
-                base_url=self.base_url,
-                temperature=settings.llm.generation.temperature,
-                num_predict=settings.llm.generation.max_tokens,
-                top_p=settings.llm.generation.top_p,
-                headers=self._get_headers(),
+        warmed = 0
+        for result in results:
+            if isinstance(result, httpx.Response) and result.is_success:
+                warmed += 1
+        
+        if warmed:
+            logger.info(f"Warmed {warmed}/{n} Ollama connections")
+        else:
+            logger.warning(f"Could not warm Ollama connections at {self.base_url}")
+        return warmed
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client."""
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
+    
+    def _model_semaphore(self, model: str) -> asyncio.Semaphore:
+        """Get the semaphore bounding concurrent generations for a model.
+        
+        Ollama runs up to OLLAMA_NUM_PARALLEL requests per loaded model and
+        queues the rest; llm.num_parallel should match it so requests are
+        pipelined without holding extra connections open in the server queue.
+        """
+        semaphore = self._model_semaphores.get(model)
+        if semaphore is None:
+            semaphore = self._model_semaphores[model] = asyncio.Semaphore(
+                max(1, settings.llm.num_parallel)
             )
-            logger.info(f"Initialized Ollama model: {model} (ngrok: {self._is_ngrok})")
+        return semaphore
+    
+    @staticmethod
+    def _generation_options() -> dict[str, Any]:
+        """Get the Ollama generation options from config."""
+        generation = settings.llm.generation
+        options = {
+            "temperature": generation.temperature,
+            "num_predict": generation.max_tokens,
+            "top_p": generation.top_p,
+        }
+        if generation.num_keep is not None:
+            options["num_keep"] = generation.num_keep
+        return options
+    
+    async def _raw_generate(self, model: str, prompt: str, options: dict[str, Any]) -> str:
+        """Run a non-streaming /api/generate request.
+        
+        Args:
+            model: Model name.
+            prompt: The prompt to generate from.
+            options: Ollama generation options.
+            
+        Returns:
+            Generated text.
+        """
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": settings.llm.keep_alive,
+            "options": options,
+        }
         
-        return self._models[model]
+        client = await self._get_client()
+        async with self._model_semaphore(model):
+            response = await client.post("/api/generate", content=orjson.dumps(payload))
+        response.raise_for_status()
+        return orjson.loads(response.content).get("response", "")
+    
+    @staticmethod
+    def _response_cache_key(model: str, prompt: str, options: dict[str, Any]) -> bytes:
+        """Build the response cache key for a prompt and the generation options."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(model.encode())
+        digest.update(b"|")
+        digest.update(orjson.dumps(options, option=orjson.OPT_SORT_KEYS))
+        digest.update(b"|")
+        digest.update(prompt.encode())
+        return digest.digest()
+    
+    def _cache_get(self, key: bytes) -> Optional[str]:
+        """Get a cached response, marking it as recently used."""
+        entry = self._response_cache.pop(key, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        self._response_cache[key] = entry
+        return entry[1]
+    
+    def _cache_put(self, key: bytes, response: str) -> None:
+        """Store a response, evicting the least recently used entry when full."""
+        self._response_cache.pop(key, None)
+        if len(self._response_cache) >= _RESPONSE_CACHE_MAX_ENTRIES:
+            del self._response_cache[next(iter(self._response_cache))]
+        self._response_cache[key] = (time.monotonic() + _RESPONSE_CACHE_TTL, response)
     
     async def generate(
         self,
         prompt: str,
         model: Optional[str] = None,
+        use_cache: bool = True,
         **kwargs: Any,
     ) -> str:
         """Generate text from a prompt.
@@ -81,19 +290,56 @@ class LLMService:
         Args:
             prompt: The prompt to generate from.
             model: Optional model override.
-            **kwargs: Additional generation parameters.
+            use_cache: Whether to serve and store identical requests from the response cache.
+            **kwargs: Ollama generation options overriding the configured ones
+                (e.g. temperature, num_predict, top_p, stop).
             
         Returns:
             Generated text.
         """
-        llm = self._get_model(model)
+        model = model or self.default_model
+        options = self._generation_options()
+        options.update(kwargs)
+        cache_key = self._response_cache_key(model, prompt, options) if use_cache else None
+        if cache_key is not None:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug(f"Response cache hit for model {model}")
+                return cached
+            
+            # Join an identical generation that is already running
+            while (in_flight := self._in_flight.get(cache_key)) is not None:
+                try:
+                    return await asyncio.shield(in_flight)
+                except asyncio.CancelledError:
+                    # Only retry if the joined call was cancelled, not this one
+                    if not in_flight.cancelled() or asyncio.current_task().cancelling():
+                        raise
+            
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[cache_key] = future
         
         try:
-            response = await llm.ainvoke(prompt)
-            return response
+            response = await self._raw_generate(model, prompt, options)
+        except asyncio.CancelledError:
+            if cache_key is not None:
+                self._in_flight.pop(cache_key, None)
+                future.cancel()
+            raise
         except Exception as e:
             logger.error(f"Error generating text: {e}")
+            if cache_key is not None:
+                self._in_flight.pop(cache_key, None)
+                future.set_exception(e)
+                # Joined callers re-raise it; don't warn when there are none
+                future.exception()
             raise
+        
+        if cache_key is not None:
+            self._cache_put(cache_key, response)
+            self._in_flight.pop(cache_key, None)
+            future.set_result(response)
+        return response
     
     async def generate_with_image(
         self,
@@ -126,11 +372,10 @@ class LLMService:
             except AttributeError:
                 model_name = self.default_model
         
-        # Convert images to base64
-        image_b64_list = []
-        for img_bytes in images:
-            img_b64 = base64.b64encode(img_bytes).decode("utf-8")
-            image_b64_list.append(img_b64)
+        # Convert images to base64 in worker threads to keep the event loop free
+        image_b64_list = list(await asyncio.gather(
+            *(asyncio.to_thread(_encode_image, img_bytes) for img_bytes in images)
+        ))
         
         # Prepare request payload
         payload = {
@@ -138,45 +383,35 @@ class LLMService:
             "prompt": prompt,
             "images": image_b64_list,
             "stream": stream,
-            "options": {
-                "temperature": settings.llm.generation.temperature,
-                "num_predict": settings.llm.generation.max_tokens,
-                "top_p": settings.llm.generation.top_p,
-            },
+            "keep_alive": settings.llm.keep_alive,
+            "options": self._generation_options(),
         }
         
         try:
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                url = f"{self.base_url}/api/generate"
-                headers = self._get_headers()
-                
+            client = await self._get_client()
+            
+            async with self._model_semaphore(model_name):
                 if stream:
                     # Stream response
                     async with client.stream(
                         "POST",
-                        url,
-                        json=payload,
-                        headers=headers,
+                        "/api/generate",
+                        content=orjson.dumps(payload),
                     ) as response:
                         response.raise_for_status()
-                        full_response = ""
-                        async for line in response.aiter_lines():
-                            if line:
-                                import json
-                                try:
-                                    chunk = json.loads(line)
-                                    if "response" in chunk:
-                                        full_response += chunk["response"]
-                                    if chunk.get("done", False):
-                                        break
-                                except json.JSONDecodeError:
-                                    continue
-                        return full_response
+                        parts: list[str] = []
+                        async for chunk in _iter_ndjson(response):
+                            text = chunk.get("response")
+                            if text:
+                                parts.append(text)
+                            if chunk.get("done", False):
+                                break
+                        return "".join(parts)
                 else:
                     # Non-streaming response
-                    response = await client.post(url, json=payload, headers=headers)
+                    response = await client.post("/api/generate", content=orjson.dumps(payload))
                     response.raise_for_status()
-                    data = response.json()
+                    data = orjson.loads(response.content)
                     return data.get("response", "")
                     
         except Exception as e:
@@ -188,6 +423,7 @@ class LLMService:
         template: str,
         variables: dict[str, Any],
         model: Optional[str] = None,
+        use_cache: bool = True,
     ) -> str:
         """Generate text using a prompt template.
         
@@ -195,20 +431,19 @@ class LLMService:
             template: Prompt template string with {variable} placeholders.
             variables: Dictionary of variables to fill in the template.
             model: Optional model override.
+            use_cache: Whether to serve and store identical requests from the response cache.
             
         Returns:
             Generated text.
         """
-        llm = self._get_model(model)
-        prompt = PromptTemplate.from_template(template)
-        chain = prompt | llm | StrOutputParser()
-        
+        # Render first so the cache is keyed on the exact prompt sent to the model
         try:
-            response = await chain.ainvoke(variables)
-            return response
+            prompt = template.format_map(variables)
         except Exception as e:
             logger.error(f"Error generating with template: {e}")
             raise
+        
+        return await self.generate(prompt, model, use_cache=use_cache)
     
     async def generate_documentation(
         self,
@@ -228,7 +463,22 @@ class LLMService:
         
         template = self._get_documentation_template(doc_type)
         
-        variables = {
+        # Formatting large designs is CPU-bound; keep it off the event loop
+        variables = await asyncio.to_thread(self._build_variables, design_info, doc_type)
+        
+        return await self.generate_with_template(template, variables, model)
+    
+    def _build_variables(self, design_info: dict[str, Any], doc_type: str) -> dict[str, Any]:
+        """Build the documentation template variables from design information.
+        
+        Args:
+            design_info: Extracted design information from Figma.
+            doc_type: Type of documentation (user, dev, both).
+            
+        Returns:
+            Template variables.
+        """
+        return {
             "file_name": design_info.get("file_name", "Unknown"),
             "pages": self._format_pages(design_info.get("pages", [])),
             "components": self._format_components(design_info.get("components", [])),
@@ -237,10 +487,9 @@ class LLMService:
             "typography": self._format_typography(design_info.get("typography", [])),
             "doc_type": doc_type,
         }
-        
-        return await self.generate_with_template(template, variables, model)
     
-    def _get_documentation_template(self, doc_type: str) -> str:
+    @staticmethod
+    def _get_documentation_template(doc_type: str) -> str:
         """Get the documentation generation template.
 
         Args:
@@ -249,29 +498,24 @@ class LLMService:
         Returns:
             Prompt template string.
         """
-        base_template = """You are an expert technical documentation writer specializing in UI/UX design documentation.
-Your task is to generate COMPREHENSIVE and DETAILED documentation for the following Figma design.
-
-IMPORTANT: Generate extensive, thorough documentation. Do NOT be brief. Each section should be detailed and informative.
-
-# Design: {file_name}
-
-## Pages and Screens
-{pages}
-
-## Components
-{components}
-
-## Design Styles
-{styles}
+        return _DOC_TEMPLATES.get(doc_type, _DOC_TEMPLATES["both"])
+    
+    @staticmethod
+    def _build_documentation_template(doc_type: str) -> str:
+        """Build the documentation generation template.
 
-## Color Palette
-{colors}
+        Args:
+            doc_type: Type of documentation to generate.
 
-## Typography
-{typography}
+        Returns:
+            Prompt template string.
+        """
+        # Instructions come first and the design data last, so the static
+        # prefix is identical across requests and Ollama can reuse its KV cache
+        base_template = """You are an expert technical documentation writer specializing in UI/UX design documentation.
+Your task is to generate COMPREHENSIVE and DETAILED documentation for the Figma design described at the end of this prompt.
 
----
+IMPORTANT: Generate extensive, thorough documentation. Do NOT be brief. Each section should be detailed and informative.
 
 """
 
@@ -461,7 +705,26 @@ FORMATTING REQUIREMENTS:
 - Add horizontal rules (---) between major sections
 
 REMEMBER: Generate EXTENSIVE documentation. Do not summarize or abbreviate.
-Each section should be detailed and comprehensive."""
+Each section should be detailed and comprehensive.
+
+---
+
+# Design: {file_name}
+
+## Pages and Screens
+{pages}
+
+## Components
+{components}
+
+## Design Styles
+{styles}
+
+## Color Palette
+{colors}
+
+## Typography
+{typography}"""
 
         return base_template
     
@@ -470,30 +733,28 @@ Each section should be detailed and comprehensive."""
         if not pages:
             return "No pages found."
         
-        lines = []
+        lines: list[str] = []
+        append = lines.append
         for page in pages:
-            lines.append(f"### {page.get('name', 'Unnamed Page')}")
+            append(f"### {page.get('name', 'Unnamed Page')}")
             
             frames = page.get("frames", [])
             if frames:
-                lines.append("Frames/Screens:")
-                for frame in frames[:10]:  # Limit to prevent token overflow
+                append("Frames/Screens:")
+                for frame in itertools.islice(frames, 10):  # Limit to prevent token overflow
                     frame_name = frame.get("name", "Unnamed")
                     dims = frame.get("dimensions", {})
                     size = f" ({dims.get('width', '?')}x{dims.get('height', '?')})" if dims else ""
-                    lines.append(f"  - {frame_name}{size}")
+                    append(f"  - {frame_name}{size}")
                     
                     # Add children summary
                     children = frame.get("children", [])
                     if children:
-                        child_types = {}
-                        for child in children:
-                            ctype = child.get("type", "Unknown")
-                            child_types[ctype] = child_types.get(ctype, 0) + 1
+                        child_types = Counter(child.get("type", "Unknown") for child in children)
                         types_str = ", ".join(f"{v} {k}" for k, v in child_types.items())
-                        lines.append(f"    Contains: {types_str}")
+                        append(f"    Contains: {types_str}")
             
-            lines.append("")
+            append("")
         
         return "\n".join(lines)
     
@@ -502,50 +763,39 @@ Each section should be detailed and comprehensive."""
         if not components:
             return "No components defined."
         
-        lines = []
-        for comp in components[:20]:  # Limit components
-            name = comp.get("name", "Unnamed")
-            desc = comp.get("description", "")
-            lines.append(f"- **{name}**" + (f": {desc}" if desc else ""))
-        
-        return "\n".join(lines)
+        return "\n".join(
+            f"- **{comp.get('name', 'Unnamed')}**"
+            + (f": {comp['description']}" if comp.get("description") else "")
+            for comp in itertools.islice(components, 20)  # Limit components
+        )
     
     def _format_styles(self, styles: list[dict]) -> str:
         """Format styles information for the prompt."""
         if not styles:
             return "No styles defined."
         
-        lines = []
-        for style in styles[:20]:
-            name = style.get("name", "Unnamed")
-            stype = style.get("type", "")
-            lines.append(f"- {name} ({stype})")
-        
-        return "\n".join(lines)
+        return "\n".join(
+            f"- {style.get('name', 'Unnamed')} ({style.get('type', '')})"
+            for style in itertools.islice(styles, 20)
+        )
     
     def _format_colors(self, colors: list[dict]) -> str:
         """Format color information for the prompt."""
         if not colors:
             return "No color styles defined."
         
-        lines = []
-        for color in colors[:15]:
-            name = color.get("name", "Unnamed")
-            lines.append(f"- {name}")
-        
-        return "\n".join(lines)
+        return "\n".join(
+            f"- {color.get('name', 'Unnamed')}" for color in itertools.islice(colors, 15)
+        )
     
     def _format_typography(self, typography: list[dict]) -> str:
         """Format typography information for the prompt."""
         if not typography:
             return "No typography styles defined."
         
-        lines = []
-        for typo in typography[:15]:
-            name = typo.get("name", "Unnamed")
-            lines.append(f"- {name}")
-        
-        return "\n".join(lines)
+        return "\n".join(
+            f"- {typo.get('name', 'Unnamed')}" for typo in itertools.islice(typography, 15)
+        )
     
     async def chat(
         self,
@@ -565,32 +815,15 @@ Each section should be detailed and comprehensive."""
         """
         model = settings.get_model_for_task("chatbot")
         
-        template = """You are a helpful assistant that answers questions about application design and documentation.
-
-{context_section}
-
-{history_section}
-
-User: {message}
-
-Provide a helpful, accurate response based on the available context. If you don't have enough information, say so."""
-
-        context_section = f"Context from documentation:\n{context}" if context else ""
+        # Sections without content are left out of the template entirely
+        template = _CHAT_TEMPLATES[bool(context), bool(history)]
         
-        history_section = ""
+        variables = {"context": context, "message": message}
         if history:
-            history_lines = []
-            for msg in history[-5:]:  # Last 5 messages
-                role = msg.get("role", "user").capitalize()
-                content = msg.get("content", "")
-                history_lines.append(f"{role}: {content}")
-            history_section = "Previous conversation:\n" + "\n".join(history_lines)
-        
-        variables = {
-            "context_section": context_section,
-            "history_section": history_section,
-            "message": message,
-        }
+            variables["history"] = "\n".join(
+                f"{msg.get('role', 'user').capitalize()}: {msg.get('content', '')}"
+                for msg in history[-5:]  # Last 5 messages
+            )
         
         return await self.generate_with_template(template, variables, model)
     
@@ -625,7 +858,7 @@ Format the output as Markdown."""
 
         variables = {
             "file_path": file_path,
-            "code_content": code_content[:8000],  # Limit code length
+            "code_content": _truncate_code(code_content, _MAX_CODE_CHARS),
         }
         
         return await self.generate_with_template(template, variables, model)
@@ -634,17 +867,52 @@ Format the output as Markdown."""
     async def list_models(self) -> list[dict[str, Any]]:
         """List all available models on the Ollama server.
         
+        Results are reused for a few seconds so back-to-back checks share one request.
+        
         Returns:
             List of model information dictionaries.
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{self.base_url}/api/tags",
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("models", [])
+        return (await self._models_snapshot())[1]
+    
+    async def _models_snapshot(
+        self,
+    ) -> tuple[float, list[dict[str, Any]], frozenset[str], frozenset[str]]:
+        """Get the cached model list with its name indexes, refreshing it if stale.
+        
+        Concurrent callers share a single /api/tags request, which is
+        revalidated with the ETag of the previous list when the server sends one.
+        """
+        snapshot = self._models_cache
+        if snapshot and snapshot[0] > time.monotonic():
+            return snapshot
+        
+        async with self._models_lock:
+            snapshot = self._models_cache
+            if snapshot and snapshot[0] > time.monotonic():
+                return snapshot
+            
+            headers = None
+            if snapshot and self._tags_etag:
+                headers = {"If-None-Match": self._tags_etag}
+            
+            client = await self._get_client()
+            response = await client.get("/api/tags", headers=headers, timeout=30.0)
+            if response.status_code == 304 and snapshot:
+                snapshot = (time.monotonic() + _MODEL_LIST_TTL, *snapshot[1:])
+            else:
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                models = data.get("models", [])
+                names = frozenset(m.get("name", "") for m in models)
+                snapshot = (
+                    time.monotonic() + _MODEL_LIST_TTL,
+                    models,
+                    names,
+                    frozenset(name.split(":")[0] for name in names),
+                )
+                self._tags_etag = response.headers.get("ETag")
+            self._models_cache = snapshot
+            return snapshot
     
     async def pull_model(self, model_name: str) -> dict[str, Any]:
         """Pull (download) a model from Ollama registry.
@@ -657,14 +925,15 @@ Format the output as Markdown."""
         """
         logger.info(f"Pulling model: {model_name}")
         
-        async with httpx.AsyncClient(timeout=600.0) as client:  # 10 min timeout for large models
-            response = await client.post(
-                f"{self.base_url}/api/pull",
-                json={"name": model_name, "stream": False},
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json()
+        client = await self._get_client()
+        response = await client.post(
+            "/api/pull",
+            content=orjson.dumps({"name": model_name, "stream": False}),
+            timeout=httpx.Timeout(600.0, connect=5.0),  # 10 min timeout for large models
+        )
+        response.raise_for_status()
+        self._models_cache = None
+        return orjson.loads(response.content)
     
     async def pull_model_stream(self, model_name: str):
         """Pull a model with streaming progress updates.
@@ -677,18 +946,25 @@ Format the output as Markdown."""
         """
         logger.info(f"Pulling model (streaming): {model_name}")
         
-        async with httpx.AsyncClient(timeout=None) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/api/pull",
-                json={"name": model_name, "stream": True},
-                headers=self._get_headers(),
-            ) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line:
-                        import json
-                        yield json.loads(line)
+        client = await self._get_client()
+        async with client.stream(
+            "POST",
+            "/api/pull",
+            content=orjson.dumps({"name": model_name, "stream": True}),
+            timeout=None,
+        ) as response:
+            response.raise_for_status()
+            async for progress in _iter_ndjson(response):
+                yield progress
+        self._models_cache = None
+    
+    @staticmethod
+    def _model_in(model_name: str, names: frozenset[str], bases: frozenset[str]) -> bool:
+        """Check if a model name matches one of the installed models.
+        
+        Falls back to matching without the tag (e.g. "llama3" vs "llama3:latest").
+        """
+        return model_name in names or model_name.split(":")[0] in bases
     
     async def check_model_exists(self, model_name: str) -> bool:
         """Check if a model exists on the Ollama server.
@@ -700,32 +976,54 @@ Format the output as Markdown."""
             True if model exists, False otherwise.
         """
         try:
-            models = await self.list_models()
-            model_names = [m.get("name", "") for m in models]
-            # Check both exact match and without tag
-            base_name = model_name.split(":")[0]
-            return any(
-                model_name == name or 
-                model_name in name or 
-                base_name in name 
-                for name in model_names
-            )
+            _, _, names, bases = await self._models_snapshot()
+            return self._model_in(model_name, names, bases)
         except Exception as e:
             logger.error(f"Error checking model existence: {e}")
             return False
     
+    @staticmethod
+    def _required_models() -> set[str]:
+        """Get the models configured for the text generation tasks."""
+        return {
+            settings.llm.models.documentation,
+            settings.llm.models.chatbot,
+            settings.llm.models.code_analysis,
+            settings.llm.models.app_analysis,
+        }
+    
+    async def preload_models(self) -> list[str]:
+        """Load the configured task models into Ollama's memory.
+        
+        Sends a prompt-less generate request per model, which makes Ollama load
+        the model and keep it for llm.keep_alive. Models are loaded one at a
+        time so they don't compete for memory while loading.
+        
+        Returns:
+            Names of the models that were loaded.
+        """
+        client = await self._get_client()
+        loaded = []
+        for model in sorted(self._required_models()):
+            try:
+                response = await client.post(
+                    "/api/generate",
+                    content=orjson.dumps({"model": model, "keep_alive": settings.llm.keep_alive}),
+                )
+                response.raise_for_status()
+                loaded.append(model)
+                logger.info(f"Preloaded model: {model}")
+            except Exception as e:
+                logger.warning(f"Failed to preload model {model}: {e}")
+        return loaded
+    
     async def ensure_models_available(self) -> dict[str, Any]:
         """Ensure all configured models are available, pulling if necessary.
         
         Returns:
             Status report of model availability and pull operations.
         """
-        required_models = set([
-            settings.llm.models.documentation,
-            settings.llm.models.chatbot,
-            settings.llm.models.code_analysis,
-            settings.llm.models.app_analysis,
-        ])
+        required_models = self._required_models()
         
         results = {
             "checked": [],
@@ -734,55 +1032,72 @@ Format the output as Markdown."""
             "failed": [],
         }
         
+        # One model list request covers every check; pull everything if it fails
+        try:
+            _, _, names, bases = await self._models_snapshot()
+        except Exception as e:
+            logger.error(f"Error checking model existence: {e}")
+            names = bases = frozenset()
+        
+        missing = []
         for model in required_models:
             results["checked"].append(model)
-            
-            try:
-                exists = await self.check_model_exists(model)
-                
-                if exists:
-                    results["already_available"].append(model)
-                    logger.info(f"Model already available: {model}")
-                else:
-                    logger.info(f"Model not found, pulling: {model}")
-                    await self.pull_model(model)
-                    results["pulled"].append(model)
-                    logger.info(f"Successfully pulled: {model}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to ensure model {model}: {e}")
-                results["failed"].append({"model": model, "error": str(e)})
+            if self._model_in(model, names, bases):
+                results["already_available"].append(model)
+                logger.info(f"Model already available: {model}")
+            else:
+                missing.append(model)
+        
+        pull_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_PULLS)
+        
+        async def pull(model: str) -> None:
+            logger.info(f"Model not found, pulling: {model}")
+            async with pull_semaphore:
+                await self.pull_model(model)
+            logger.info(f"Successfully pulled: {model}")
+        
+        outcomes = await asyncio.gather(
+            *(pull(model) for model in missing),
+            return_exceptions=True,
+        )
+        
+        for model, outcome in zip(missing, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Failed to ensure model {model}: {outcome}")
+                results["failed"].append({"model": model, "error": str(outcome)})
+            else:
+                results["pulled"].append(model)
         
         return results
     
     async def get_ollama_status(self) -> dict[str, Any]:
         """Get Ollama server status and information.
         
+        Probes the small /api/version endpoint; use list_models for the models.
+        
         Returns:
             Server status information.
         """
         logger.info(f"Checking Ollama status at: {self.base_url} (ngrok: {self._is_ngrok})")
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # Check if server is reachable
-                url = f"{self.base_url}/api/tags"
-                headers = self._get_headers()
-                logger.debug(f"Request URL: {url}, Headers: {headers}")
-                
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                models = response.json().get("models", [])
-                
-                logger.info(f"Ollama online with {len(models)} models")
-                
-                return {
-                    "status": "online",
-                    "url": self.base_url,
-                    "is_ngrok": self._is_ngrok,
-                    "models_count": len(models),
-                    "models": [m.get("name") for m in models],
-                }
+            client = await self._get_client()
+            
+            # Check if server is reachable
+            logger.debug(f"Request URL: {self.base_url}/api/version, Headers: {self._get_headers()}")
+            
+            response = await client.get("/api/version", timeout=5.0)
+            response.raise_for_status()
+            version = orjson.loads(response.content).get("version")
+            
+            logger.info(f"Ollama online (version {version})")
+            
+            return {
+                "status": "online",
+                "url": self.base_url,
+                "is_ngrok": self._is_ngrok,
+                "version": version,
+            }
         except httpx.ConnectError as e:
             logger.error(f"Cannot connect to Ollama at {self.base_url}: {e}")
             return {
@@ -809,6 +1124,28 @@ Format the output as Markdown."""
             }
 
 
+# Documentation prompt templates, built once at import
+_DOC_TEMPLATES: dict[str, str] = {
+    doc_type: LLMService._build_documentation_template(doc_type)
+    for doc_type in ("user", "dev", "both")
+}
+
+
+# Chat prompt templates keyed by (has context, has history)
+_CHAT_TEMPLATES: dict[tuple[bool, bool], str] = {
+    (has_context, has_history): "\n\n".join([
+        "You are a helpful assistant that answers questions about application design and documentation.",
+        *(["Context from documentation:\n{context}"] if has_context else []),
+        *(["Previous conversation:\n{history}"] if has_history else []),
+        "User: {message}",
+        "Provide a helpful, accurate response based on the available context. "
+        "If you don't have enough information, say so.",
+    ])
+    for has_context in (False, True)
+    for has_history in (False, True)
+}
+
+
 # Global LLM service instance
 _llm_service: Optional[LLMService] = None
 
@@ -818,5 +1155,13 @@ def get_llm_service() -> LLMService:
     global _llm_service
     if _llm_service is None:
         _llm_service = LLMService()
+        
+        # Warm the connection pool in the background when called from the event loop
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            _llm_service._warmup_task = asyncio.create_task(_llm_service.warmup())
     return _llm_service
 